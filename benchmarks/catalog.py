@@ -0,0 +1,30 @@
+"""Opening catalogs of databases with many tables"""
+from intake_sql import SQLCatalog
+from intake_sql.engines import dispose_engines
+
+from .utils import make_db
+
+
+class SQLCatalogSuite:
+    params = [10, 100, 1000]
+    param_names = ['ntables']
+
+    def setup(self, ntables):
+        self.uri = make_db(10, 4, ntables=ntables)
+
+    def teardown(self, ntables):
+        dispose_engines()
+
+    def time_list(self, ntables):
+        list(SQLCatalog(self.uri))
+
+    def peakmem_list(self, ntables):
+        list(SQLCatalog(self.uri))
+
+    def time_first_entry(self, ntables):
+        SQLCatalog(self.uri)['t0']
+
+    def time_all_entries(self, ntables):
+        cat = SQLCatalog(self.uri)
+        for name in cat:
+            cat[name]
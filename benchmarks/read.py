@@ -0,0 +1,95 @@
+"""Reading whole tables with each kind of source"""
+from intake_sql import (SQLSource, SQLSourceAutoPartition,
+                        SQLSourceManualPartition)
+from intake_sql.engines import dispose_engines
+
+from .utils import make_db
+
+
+class SQLSourceSuite:
+    params = ([10000, 200000], [4, 16])
+    param_names = ['nrows', 'ncols']
+
+    def setup(self, nrows, ncols):
+        self.uri = make_db(nrows, ncols)
+        self.nrows = nrows
+
+    def teardown(self, nrows, ncols):
+        dispose_engines()
+
+    def source(self, **kwargs):
+        return SQLSource(self.uri, 't0', sql_kwargs=dict(index_col='id'),
+                         **kwargs)
+
+    def time_discover(self, nrows, ncols):
+        self.source().discover()
+
+    def time_read(self, nrows, ncols):
+        self.source().read()
+
+    def peakmem_read(self, nrows, ncols):
+        self.source().read()
+
+    def time_read_compact(self, nrows, ncols):
+        self.source(dtype_policy='compact').read()
+
+    def peakmem_read_compact(self, nrows, ncols):
+        self.source(dtype_policy='compact').read()
+
+    def peakmem_read_fetch_size(self, nrows, ncols):
+        SQLSource(self.uri, 't0',
+                  sql_kwargs=dict(index_col='id', fetch_size=10000)).read()
+
+    def time_to_arrow(self, nrows, ncols):
+        self.source().to_arrow()
+
+
+class AutoPartitionSuite:
+    params = ([1, 4, 16], [None, 4])
+    param_names = ['npartitions', 'max_workers']
+
+    def setup(self, npartitions, max_workers):
+        self.uri = make_db(200000, 8)
+
+    def teardown(self, npartitions, max_workers):
+        dispose_engines()
+
+    def source(self, npartitions, max_workers):
+        return SQLSourceAutoPartition(
+            self.uri, 't0', index='id', max_workers=max_workers,
+            sql_kwargs=dict(npartitions=npartitions))
+
+    def time_discover(self, npartitions, max_workers):
+        self.source(npartitions, max_workers).discover()
+
+    def time_read(self, npartitions, max_workers):
+        self.source(npartitions, max_workers).read()
+
+    def peakmem_read(self, npartitions, max_workers):
+        self.source(npartitions, max_workers).read()
+
+
+class ManualPartitionSuite:
+    params = ([1, 4, 16], [None, 4])
+    param_names = ['npartitions', 'max_workers']
+
+    def setup(self, npartitions, max_workers):
+        self.nrows = 200000
+        self.uri = make_db(self.nrows, 8)
+
+    def teardown(self, npartitions, max_workers):
+        dispose_engines()
+
+    def source(self, npartitions, max_workers):
+        step = -(-self.nrows // npartitions)
+        return SQLSourceManualPartition(
+            self.uri, 'SELECT * FROM t0',
+            where_values=[(i, i + step) for i in range(0, self.nrows, step)],
+            where_template='WHERE id >= :lo AND id < :hi',
+            sql_kwargs=dict(index_col='id'), max_workers=max_workers)
+
+    def time_read(self, npartitions, max_workers):
+        self.source(npartitions, max_workers).read()
+
+    def peakmem_read(self, npartitions, max_workers):
+        self.source(npartitions, max_workers).read()
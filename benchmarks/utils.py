@@ -0,0 +1,64 @@
+"""
+SQLite databases of generated data for the benchmarks
+
+Each database is written once into the temporary directory and reused by
+later runs; delete the ``intake_sql_bench_*.db`` files to regenerate.
+"""
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import sqlalchemy as sa
+
+# column types, in the order they are cycled through to make up a table
+TYPES = ('int', 'float', 'text', 'datetime')
+
+_SQL_TYPES = {'int': sa.BigInteger, 'float': sa.Float, 'text': sa.Text,
+              'datetime': sa.DateTime}
+
+
+def make_frame(nrows, ncols, types=TYPES, seed=0):
+    """Random dataframe with index 'id' and ncols columns of the types"""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(ncols):
+        kind = types[i % len(types)]
+        if kind == 'int':
+            col = rng.integers(0, 1000000, nrows)
+        elif kind == 'float':
+            col = rng.random(nrows)
+        elif kind == 'text':
+            col = rng.choice(['alpha', 'beta', 'gamma', 'delta'], nrows)
+        else:
+            col = pd.Timestamp('2020-01-01') + pd.to_timedelta(
+                rng.integers(0, 10 ** 8, nrows), unit='s')
+        data['%s_%i' % (kind, i)] = col
+    return pd.DataFrame(data, index=pd.RangeIndex(nrows, name='id'))
+
+
+def make_db(nrows, ncols, ntables=1, types=TYPES):
+    """
+    Connection string of a database of tables t0, t1... of generated data
+
+    Each table has a primary key 'id', running from 0 to nrows - 1.
+    """
+    name = 'intake_sql_bench_%i_%i_%i_%s.db' % (
+        nrows, ncols, ntables, ''.join(t[0] for t in types))
+    path = os.path.join(tempfile.gettempdir(), name)
+    if not os.path.exists(path):
+        tmp = path + '.%i.tmp' % os.getpid()
+        engine = sa.create_engine('sqlite:///' + tmp)
+        df = make_frame(nrows, ncols, types)
+        meta = sa.MetaData()
+        for i in range(ntables):
+            sa.Table('t%i' % i, meta,
+                     sa.Column('id', sa.BigInteger, primary_key=True),
+                     *[sa.Column(c, _SQL_TYPES[c.split('_')[0]])
+                       for c in df.columns])
+        meta.create_all(engine)
+        for i in range(ntables):
+            df.to_sql('t%i' % i, engine, if_exists='append', chunksize=10000)
+        engine.dispose()
+        os.replace(tmp, path)
+    return 'sqlite:///' + path
@@ -0,0 +1,244 @@
+"""
+On-disk caches of query results and of partition plans
+
+Results are stored as parquet files in a local directory, one file per
+query (or per partition of a partitioned source), named by a hash of the
+connection string (without password), the SQL and the read arguments.
+
+Plans (the divisions and meta, or keyset bounds, of SQLSourceAutoPartition)
+and snapshots of the reflection of SQLCatalog are small JSON files, kept
+with a token, such as the maximum of the index or the schema version, which
+is compared with the database's current value before the file is reused.
+"""
+import hashlib
+import json
+import numbers
+import os
+import time
+import uuid
+
+
+class ResultCache(object):
+    """
+    Directory of cached dataframes, with expiry and a size bound
+
+    Parameters
+    ----------
+    path: str
+        Local directory in which to store the files; created if necessary
+    ttl: float or None
+        Seconds after being written for which a result remains valid; if
+        None, results do not expire
+    max_bytes: int or None
+        Total size of the directory above which the least recently used
+        results are deleted; if None, there is no bound
+    """
+
+    def __init__(self, path, ttl=None, max_bytes=None):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(uri, sql, kwargs=None, where=None):
+        """Hash identifying a result, independent of any password in uri"""
+        import sqlalchemy as sa
+        uri = getattr(uri, 'url', uri)  # engine
+        if uri is not None:
+            uri = sa.engine.make_url(uri).set(password=None).render_as_string(
+                hide_password=False)
+        if not isinstance(sql, str):
+            compiled = sql.compile()
+            sql = [str(compiled), compiled.params]
+        kwargs = {k: v for k, v in (kwargs or {}).items()
+                  if k not in ('engine_kwargs', 'chunksize', 'fetch_size',
+                               'stream_results')}
+        token = json.dumps([uri, sql, kwargs, where], sort_keys=True,
+                           default=str)
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def _fn(self, key):
+        return os.path.join(self.path, key + '.parquet')
+
+    def get(self, key):
+        """Cached dataframe for key, or None if absent or expired"""
+        import pandas as pd
+        fn = self._fn(key)
+        try:
+            mtime = os.stat(fn).st_mtime
+            if self.ttl is not None and time.time() - mtime > self.ttl:
+                os.remove(fn)
+                return None
+            df = pd.read_parquet(fn)
+            # access time orders eviction; keep mtime as time of writing
+            os.utime(fn, (time.time(), mtime))
+        except FileNotFoundError:
+            return None
+        return df
+
+    def put(self, key, df):
+        """Store dataframe under key, then evict down to max_bytes"""
+        os.makedirs(self.path, exist_ok=True)
+        fn = self._fn(key)
+        tmp = '%s.%s.tmp' % (fn, uuid.uuid4().hex)
+        df.to_parquet(tmp)
+        os.replace(tmp, fn)
+        if self.max_bytes is not None:
+            self._evict()
+
+    def _evict(self):
+        files = []
+        for name in os.listdir(self.path):
+            if name.endswith('.parquet'):
+                try:
+                    st = os.stat(os.path.join(self.path, name))
+                except FileNotFoundError:
+                    continue
+                files.append((st.st_atime, st.st_size, name))
+        total = sum(f[1] for f in files)
+        for _, size, name in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.path, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Remove all cached results"""
+        if os.path.isdir(self.path):
+            for name in os.listdir(self.path):
+                if name.endswith('.parquet'):
+                    os.remove(os.path.join(self.path, name))
+
+
+class _TokenStore(object):
+    """Directory of JSON files, each valid while its token is unchanged"""
+    suffix = '.json'
+
+    def __init__(self, path):
+        self.path = os.path.abspath(os.path.expanduser(path))
+
+    key = staticmethod(ResultCache.key)
+
+    def _fn(self, key):
+        return os.path.join(self.path, key + self.suffix)
+
+    def _read(self, key, token):
+        try:
+            with open(self._fn(key)) as f:
+                stored = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if stored['token'] != _jsonable(token):
+            return None
+        return stored['data']
+
+    def _write(self, key, token, data):
+        os.makedirs(self.path, exist_ok=True)
+        fn = self._fn(key)
+        tmp = '%s.%s.tmp' % (fn, uuid.uuid4().hex)
+        with open(tmp, 'w') as f:
+            json.dump({'token': _jsonable(token), 'data': data}, f)
+        os.replace(tmp, fn)
+
+
+class PlanCache(_TokenStore):
+    """
+    Directory of partition plans of SQLSourceAutoPartition
+
+    Parameters
+    ----------
+    path: str
+        Local directory in which to store the files; created if necessary
+    """
+    suffix = '.plan.json'
+
+    def get(self, key, token):
+        """(meta, divisions) stored under key, if stored with this token"""
+        import pandas as pd
+        plan = self._read(key, token)
+        if plan is None:
+            return None
+        index_name, index_dtype = plan['index']
+        meta = pd.DataFrame(
+            {name: pd.Series(dtype=dtype) for name, dtype in plan['columns']},
+            index=pd.Index([], dtype=index_dtype, name=index_name))
+        divisions = plan['divisions']
+        if divisions[0] is None:
+            divisions = (None, ) * len(divisions)
+        else:
+            divisions = tuple(pd.Series(divisions, dtype=object).astype(
+                index_dtype).tolist())
+        return meta, divisions
+
+    def put(self, key, token, meta, divisions):
+        """Store the plan and the token under key"""
+        self._write(key, token, {
+            'index': [meta.index.name, str(meta.index.dtype)],
+            'columns': [[c, str(t)] for c, t in meta.dtypes.items()],
+            'divisions': _jsonable(list(divisions))})
+
+
+    def get_bounds(self, key, token):
+        """Keyset bounds and maximum stored under key, if stored with this
+        token"""
+        plan = self._read(key, token)
+        if plan is None:
+            return None
+        return [tuple(b) for b in plan['bounds']], plan['top']
+
+    def put_bounds(self, key, token, bounds, top):
+        """Store keyset bounds (tuples of key values) and the maximum of a
+        single key column, with the token, under key"""
+        self._write(key, token, _jsonable(
+            {'bounds': [list(b) for b in bounds], 'top': top}))
+
+
+class SnapshotCache(_TokenStore):
+    """
+    Directory of snapshots of the reflection done by SQLCatalog
+
+    Parameters
+    ----------
+    path: str
+        Local directory in which to store the files; created if necessary
+    """
+    suffix = '.catalog.json'
+
+    def get(self, key, token):
+        """Snapshot (a dict) stored under key, if stored with this token"""
+        if token is None:
+            return None
+        return self._read(key, token)
+
+    def put(self, key, token, snapshot):
+        """Store the snapshot and the token under key"""
+        self._write(key, token, _jsonable(snapshot))
+
+
+def _jsonable(obj):
+    """obj as it would be after a round trip through JSON"""
+    def default(o):
+        # numpy numbers as python ones; anything else, e.g., times, as text
+        if isinstance(o, numbers.Number) and hasattr(o, 'item'):
+            return o.item()
+        return str(o)
+    return json.loads(json.dumps(obj, default=default))
+
+
+def make_plan_cache(spec):
+    """PlanCache from a directory path; or None"""
+    if spec is None or isinstance(spec, PlanCache):
+        return spec
+    return PlanCache(spec)
+
+
+def make_cache(spec):
+    """ResultCache from a directory path or dict of arguments; or None"""
+    if spec is None or isinstance(spec, ResultCache):
+        return spec
+    if isinstance(spec, str):
+        return ResultCache(spec)
+    return ResultCache(**spec)
@@ -0,0 +1,148 @@
+"""
+Compact pandas dtypes for the columns of SQL results
+
+By default, pandas makes int64, float64 and object columns, and floats for
+integer columns containing nulls. With ``dtype_policy='compact'``, the
+sources instead give pandas a ``dtype`` for each column, derived from its
+declared SQL type, which is applied to each chunk of rows as it is fetched.
+"""
+
+
+def _string_dtype():
+    try:
+        import pyarrow  # noqa: F401
+        return 'string[pyarrow]'
+    except ImportError:
+        return 'string'
+
+
+def sql_dtype(satype, nullable=True, dialect=None):
+    """
+    Compact pandas dtype for a SQLAlchemy column type, or None to keep the
+    default
+
+    Integers are sized by their SQL type, one size up if unsigned, and
+    nullable ones use pandas' masked integer types rather than float;
+    enumerations become categories and text pyarrow-backed strings (if
+    pyarrow is installed).
+    """
+    import sqlalchemy as sa
+    if isinstance(satype, sa.Enum):
+        return 'category'
+    if isinstance(satype, sa.String):
+        return _string_dtype()
+    if isinstance(satype, sa.Boolean):
+        return 'boolean' if nullable else 'bool'
+    if isinstance(satype, sa.Integer):
+        if dialect == 'oracle':
+            # INTEGER is NUMBER(38), which may not fit even 64 bits
+            return None
+        if dialect == 'sqlite' or isinstance(satype, sa.BigInteger):
+            # any INTEGER in SQLite may hold 64 bits
+            bits = 64
+        elif isinstance(satype, sa.SmallInteger):
+            bits = 16
+        else:
+            bits = 32
+        if getattr(satype, 'unsigned', False):
+            if bits == 64:
+                return 'UInt64' if nullable else 'uint64'
+            bits *= 2
+        return ('Int%i' if nullable else 'int%i') % bits
+    if isinstance(satype, sa.Float) and dialect != 'sqlite':
+        if isinstance(satype, sa.REAL) or (satype.precision or 53) <= 24:
+            return 'float32'
+    return None
+
+
+def compact_dtypes(engine, sql_expr, schema=None, nrows=100, params=None):
+    """
+    Compact pandas dtypes for the columns of a table or SQL expression
+
+    The types of a table's columns come from reflection. An expression has
+    no declared types, so only its text columns are found, from the first
+    nrows rows; none are, if it has positional params, which cannot be
+    bound in the sub-query limiting it.
+
+    Parameters
+    ----------
+    engine: SQLAlchemy engine
+    sql_expr: str
+        Table name or SQL query
+    schema: str or None
+        Schema containing the table
+    nrows: int
+        Rows of an expression to inspect
+    params: dict, list or None
+        Values of any bound parameters of the expression
+
+    Returns
+    -------
+    dict of column name to dtype
+    """
+    import pandas as pd
+    import sqlalchemy as sa
+    from .intake_sql import _is_table, _positional, probe_sql
+    if _is_table(sql_expr, schema):
+        insp = sa.inspect(engine)
+        pk = insp.get_pk_constraint(sql_expr, schema=schema)
+        keys = set(pk.get('constrained_columns') or [])
+        out = {}
+        for col in insp.get_columns(sql_expr, schema=schema):
+            nullable = col.get('nullable', True) and col['name'] not in keys
+            dtype = sql_dtype(col['type'], nullable, engine.dialect.name)
+            if dtype is not None:
+                out[col['name']] = dtype
+        return out
+    if _positional({'params': params}):
+        return {}
+    head = probe_sql(engine, sql_expr, nrows, {'params': params})
+    return {c: _string_dtype() for c in head.columns
+            if pd.api.types.infer_dtype(head[c], skipna=True) == 'string'}
+
+
+def policy_dtypes(policy, engine, sql_expr, kwargs):
+    """
+    The ``dtype`` argument for pandas implied by a source's dtype_policy
+
+    Parameters
+    ----------
+    policy: None, 'compact' or dict
+        If a dict, these dtypes of columns are used in addition to, or in
+        place of, the compact ones; e.g., ``{'name': 'category'}`` for text
+        of low cardinality
+    engine: SQLAlchemy engine
+    sql_expr: str
+        Table name or SQL query
+    kwargs: dict
+        The source's sql_kwargs; any ``dtype`` there takes precedence, and
+        only the ``columns`` (and index_col) there are included
+
+    Returns
+    -------
+    dict of column name to dtype, or None
+    """
+    if policy is None:
+        return kwargs.get('dtype')
+    if policy != 'compact' and not isinstance(policy, dict):
+        raise ValueError("dtype_policy must be None, 'compact' or a dict, "
+                         "not %r" % (policy, ))
+    dtypes = compact_dtypes(engine, sql_expr, kwargs.get('schema'),
+                            params=kwargs.get('params'))
+    if kwargs.get('columns'):
+        index = kwargs.get('index_col')
+        index = [index] if isinstance(index, str) else list(index or [])
+        keep = set(kwargs['columns']) | set(index)
+        dtypes = {k: v for k, v in dtypes.items() if k in keep}
+    if isinstance(policy, dict):
+        dtypes.update(policy)
+    dtypes.update(kwargs.get('dtype') or {})
+    return dtypes
+
+
+def apply_dtypes(df, dtypes):
+    """Frame with dtypes applied to those of its columns and index named"""
+    df = df.astype({k: v for k, v in dtypes.items() if k in df.columns})
+    if df.index.name in dtypes:
+        df.index = df.index.astype(dtypes[df.index.name])
+    return df
@@ -0,0 +1,129 @@
+"""
+Process-local registry of SQLAlchemy engines
+
+Every source, and every dask partition executed in the same process, asks
+here for an engine instead of passing a bare connection string to pandas,
+so that connections are pooled and reused rather than opened (with any
+TLS/authentication handshake) once per query.
+
+The registry is cleared in the child after a fork, since pooled connections
+cannot be shared between processes.
+
+Engines for asyncio drivers are kept separately for each event loop, since
+their connections can only be used on the loop which made them.
+"""
+import os
+import threading
+import weakref
+
+_registry = {}
+_async_registry = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+# asyncio driver to use in place of the default one for each backend
+_ASYNC_DRIVERS = {'sqlite': 'aiosqlite', 'postgresql': 'asyncpg',
+                  'mysql': 'aiomysql', 'mariadb': 'aiomysql',
+                  'mssql': 'aioodbc', 'oracle': 'oracledb'}
+_ASYNC_NATIVE = ('aiosqlite', 'asyncpg', 'psycopg', 'aiomysql', 'asyncmy',
+                 'aioodbc', 'oracledb')
+
+
+def _registered(key, factory):
+    """Object stored under key, made by calling factory() on first use"""
+    with _lock:
+        if key not in _registry:
+            _registry[key] = factory()
+        return _registry[key]
+
+
+def get_engine(uri, **engine_kwargs):
+    """
+    Shared engine for the given connection string and engine options
+
+    Parameters
+    ----------
+    uri: str
+        connection string (sql sqlalchemy documentation)
+    engine_kwargs:
+        Passed to sqlalchemy.create_engine, e.g., ``pool_size`` and
+        ``max_overflow`` to bound the number of simultaneous connections.
+        Engines with different options are kept separately.
+    """
+    import sqlalchemy as sa
+    key = ('engine', uri,
+           tuple(sorted((k, repr(v)) for k, v in engine_kwargs.items())))
+    return _registered(key, lambda: sa.create_engine(uri, **engine_kwargs))
+
+
+def async_url(uri):
+    """
+    Connection string with its driver replaced by an asyncio one
+
+    e.g., ``sqlite:///data.db`` becomes ``sqlite+aiosqlite:///data.db`` and
+    ``postgresql+psycopg2://...`` becomes ``postgresql+asyncpg://...``; a
+    driver which already supports asyncio is kept.
+    """
+    import sqlalchemy as sa
+    url = sa.engine.make_url(uri)
+    backend = url.get_backend_name()
+    if '+' in url.drivername and url.get_driver_name() in _ASYNC_NATIVE:
+        return url
+    if backend not in _ASYNC_DRIVERS:
+        raise ValueError("No known asyncio driver for %s" % backend)
+    return url.set(drivername='%s+%s' % (backend, _ASYNC_DRIVERS[backend]))
+
+
+def get_async_engine(uri, **engine_kwargs):
+    """
+    Shared asyncio engine for the connection string, on the running loop
+
+    Parameters
+    ----------
+    uri: str
+        connection string (sql sqlalchemy documentation), with either a
+        synchronous or asyncio driver; see ``async_url``
+    engine_kwargs:
+        Passed to sqlalchemy.ext.asyncio.create_async_engine
+    """
+    import asyncio
+    from sqlalchemy.ext.asyncio import create_async_engine
+    loop = asyncio.get_running_loop()
+    key = ('async', uri,
+           tuple(sorted((k, repr(v)) for k, v in engine_kwargs.items())))
+    with _lock:
+        engines = _async_registry.setdefault(loop, {})
+        if key not in engines:
+            engines[key] = create_async_engine(async_url(uri),
+                                               **engine_kwargs)
+        return engines[key]
+
+
+def _engines():
+    for obj in _registry.values():
+        if isinstance(obj, tuple):
+            # (ibis client, supports_schemas); the client holds its own engine
+            obj = getattr(obj[0], 'con', None)
+        if hasattr(obj, 'dispose'):
+            yield obj
+
+
+def dispose_engines():
+    """Close all pooled connections and forget the registered engines"""
+    with _lock:
+        for engine in _engines():
+            engine.dispose()
+        _registry.clear()
+
+
+def _after_fork():
+    global _lock
+    _lock = threading.Lock()
+    # the connections belong to the parent: drop them without closing
+    for engine in _engines():
+        engine.dispose(close=False)
+    _registry.clear()
+    _async_registry.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
@@ -0,0 +1,153 @@
+"""
+Instrumentation of queries
+
+Each query for data (a whole SQLSource, a partition, a schema probe), each
+partition planning and each catalog reflection produces an event: a dict
+with
+
+- ``kind``: 'load', 'partition', 'probe', 'plan' or 'reflect'
+- ``sql_hash``: short hash of the SQL text, the same for all partitions
+  sharing a where_template; partitions are told apart by ``where`` and
+  ``params``, where present
+- ``connect``, ``execute``, ``fetch``, ``total``: seconds spent getting a
+  connection, in the database's execution of statements, in fetching and
+  building the result (the rest), and altogether
+- ``rows``, ``bytes``: size of the resulting dataframe, if any; bytes
+  do not include the contents of Python objects such as strings
+
+Events are passed to every function registered with ``add_callback``, and
+logged at DEBUG level to the ``intake_sql`` logger. When there are no
+callbacks and DEBUG logging is off, nothing is measured.
+"""
+import contextlib
+import hashlib
+import logging
+import threading
+import time
+
+logger = logging.getLogger('intake_sql')
+
+_callbacks = []
+_local = threading.local()
+_listening = False
+_KEY = '_intake_sql_event'
+
+
+def add_callback(func):
+    """Call func(event) after each instrumented operation"""
+    _listen()
+    _callbacks.append(func)
+
+
+def remove_callback(func):
+    """Stop calling a function given to add_callback"""
+    _callbacks.remove(func)
+
+
+def enabled():
+    return bool(_callbacks) or logger.isEnabledFor(logging.DEBUG)
+
+
+def sql_hash(sql):
+    """Short hash of the text of a query (str or SQLAlchemy selectable)"""
+    if sql is None:
+        return None
+    return hashlib.sha1(str(sql).encode()).hexdigest()[:16]
+
+
+@contextlib.contextmanager
+def measure(kind, sql=None, track=False, **info):
+    """
+    Time the enclosed block and report it as an event
+
+    Yields the event dict, to which the block may add (e.g., ``connect``
+    time and the result's ``rows``), or None if instrumentation is off.
+
+    Parameters
+    ----------
+    kind: str
+        Type of operation
+    sql: str, SQLAlchemy selectable or None
+        Query, of which the hash is reported
+    track: bool
+        Whether statements executed by this thread during the block count
+        towards its execute time, even on connections not passed to
+        ``attach``; for queries made by other libraries, like dask. Not for
+        use with asyncio, where several tasks share the thread.
+    info:
+        Further items to include in the event
+    """
+    if not enabled():
+        yield None
+        return
+    _listen()
+    event = dict(kind=kind, sql_hash=sql_hash(sql), connect=0., execute=0.,
+                 **info)
+    if track:
+        previous = getattr(_local, 'event', None)
+        _local.event = event
+    start = time.perf_counter()
+    try:
+        yield event
+    finally:
+        event['total'] = time.perf_counter() - start
+        event['fetch'] = max(
+            event['total'] - event['connect'] - event['execute'], 0.)
+        if track:
+            _local.event = previous
+        _emit(event)
+
+
+@contextlib.contextmanager
+def attach(con, event):
+    """Count statements executed on the connection towards the event"""
+    if event is None:
+        yield
+        return
+    con.info[_KEY] = event
+    try:
+        yield
+    finally:
+        con.info.pop(_KEY, None)
+
+
+def _emit(event):
+    logger.debug("%(kind)s %(sql_hash)s: %(total).3fs (connect %(connect)"
+                 ".3fs, execute %(execute).3fs, fetch %(fetch).3fs), "
+                 "%(rows)s rows, %(bytes)s bytes",
+                 dict({'rows': None, 'bytes': None}, **event))
+    for func in list(_callbacks):
+        try:
+            func(event)
+        except Exception:
+            logger.exception("Instrumentation callback %r failed", func)
+
+
+def _event(conn):
+    return conn.info.get(_KEY) or getattr(_local, 'event', None)
+
+
+def _before_execute(conn, cursor, statement, parameters, context,
+                    executemany):
+    if _event(conn) is not None:
+        conn.info['_intake_sql_started'] = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context,
+                   executemany):
+    event = _event(conn)
+    started = conn.info.pop('_intake_sql_started', None)
+    if event is not None and started is not None:
+        event['execute'] += time.perf_counter() - started
+
+
+def _listen():
+    """Install the listeners timing execution, on all engines"""
+    global _listening
+    if not _listening:
+        import sqlalchemy as sa
+        sa.event.listen(sa.engine.Engine, 'before_cursor_execute',
+                        _before_execute)
+        sa.event.listen(sa.engine.Engine, 'after_cursor_execute',
+                        _after_execute)
+        _listening = True
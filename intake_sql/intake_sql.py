@@ -1,12 +1,15 @@
 from intake.source import base
 from . import __version__
+from .cache import make_cache, make_plan_cache
+from .engines import get_engine
 
 
 class SQLSource(base.DataSource):
     """
     One-shot SQL to dataframe reader (no partitioning)
 
-    Caches entire dataframe in memory.
+    Caches entire dataframe in memory, unless iterating with
+    ``read_chunked()``, which streams the result in pieces.
 
     Parameters
     ----------
@@ -15,52 +18,246 @@ class SQLSource(base.DataSource):
     sql_expr: str
         Query expression to pass to the DB backend
     sql_kwargs: dict
-        Further arguments to pass to pandas.read_sql
+        Further arguments to pass to pandas.read_sql. Also, for every
+        source, ``fetch_size`` and/or ``stream_results=True``: fetch the rows
+        with a server-side cursor, fetch_size (default 10000) at a time,
+        building the dataframe from these batches instead of letting the
+        driver buffer the whole result.
+    probe_rows: int or None
+        Number of leading rows to fetch when discovering the schema, wrapping
+        the expression in a ``LIMIT`` query. If None, or if ``params`` in
+        sql_kwargs are positional (a list or tuple), discovery loads the
+        whole result, as ``read()`` does.
+    count_rows: bool
+        Whether discovery should also issue a ``COUNT(*)`` query, to give the
+        number of rows in the shape; otherwise the row count is None until
+        the data are loaded.
+    result_cache: str, dict or None
+        If given, results are stored in and re-read from files in a local
+        directory; either the path, or the arguments of
+        ``intake_sql.cache.ResultCache`` (path, ttl, max_bytes)
+    watermark: str or None
+        Column (or index_col) whose values only increase as rows are
+        appended. If given, each ``read()`` after the first fetches only
+        the rows beyond the largest value already held, and appends them;
+        with result_cache, the accumulated result persists between
+        sessions. Updates to existing rows are not seen.
+    columns: list of str or None
+        If given, only these columns (and any index_col) are selected, in
+        the SQL sent to the database, rather than dropped after loading
+    dtype_policy: None, 'compact' or dict
+        With 'compact', each column is given the smallest pandas dtype
+        suited to its SQL type as it is fetched (see ``intake_sql.dtypes``);
+        a dict additionally gives dtypes for particular columns, e.g.,
+        ``{'name': 'category'}``
     """
     name = 'sql'
     version = __version__
     container = 'dataframe'
     partition_access = True
 
-    def __init__(self, uri, sql_expr, sql_kwargs={}, metadata={}):
+    def __init__(self, uri, sql_expr, sql_kwargs={}, metadata={},
+                 probe_rows=100, count_rows=False, result_cache=None,
+                 watermark=None, columns=None, dtype_policy=None):
         self._init_args = {
             'uri': uri,
             'sql_expr': sql_expr,
             'sql_kwargs': sql_kwargs,
             'metadata': metadata,
+            'probe_rows': probe_rows,
+            'count_rows': count_rows,
+            'result_cache': result_cache,
+            'watermark': watermark,
+            'columns': columns,
+            'dtype_policy': dtype_policy,
         }
 
         self._uri = uri
         self._sql_expr = sql_expr
+        if columns:
+            sql_kwargs = dict(sql_kwargs, columns=columns)
         self._sql_kwargs = sql_kwargs
+        self._probe_rows = probe_rows
+        self._count_rows = count_rows
+        self._cache = make_cache(result_cache)
+        self._watermark = watermark
+        self._dtype_policy = dtype_policy
+        self._read_kwargs = None
         self._dataframe = None
 
         super(SQLSource, self).__init__(metadata=metadata)
 
-    def _load(self):
+    def _load(self, con=None):
+        """Load the result; with con, on that connection, not the engine"""
         import pandas as pd
-        loader = pd.read_sql_table if self._sql_kwargs.get("schema") else pd.read_sql
-        self._dataframe = loader(self._sql_expr, self._uri, **self._sql_kwargs)
+        previous = self._dataframe
+        if previous is None and self._cache is not None:
+            previous = self._cache.get(self._cache_key())
+        if previous is not None:
+            if self._watermark is None:
+                self._dataframe = previous
+                return
+            new = self._load_new(previous, con)
+            if len(new):
+                previous = pd.concat([previous, new])
+                if self._cache is not None:
+                    self._cache.put(self._cache_key(), previous)
+            self._dataframe = previous
+            return
+        if self._sql_kwargs.get("chunksize") and con is None:
+            self._dataframe = pd.concat(list(self.read_chunked()))
+        else:
+            engine, kwargs = _engine(con or self._uri, self._kwargs(con))
+            kwargs.pop("chunksize", None)
+            loader, sql, kwargs = self._loader(engine, kwargs)
+            self._dataframe = _read_sql(sql, engine, kwargs, loader,
+                                        kind='load')
+        if self._cache is not None:
+            self._cache.put(self._cache_key(), self._dataframe)
+
+    def _cache_key(self):
+        kwargs = self._sql_kwargs
+        if self._dtype_policy is not None:
+            kwargs = dict(kwargs, dtype_policy=self._dtype_policy)
+        return self._cache.key(self._uri, self._sql_expr, kwargs)
+
+    def _kwargs(self, con=None):
+        """sql_kwargs, with the dtypes implied by any dtype_policy"""
+        if self._read_kwargs is None:
+            self._read_kwargs = self._sql_kwargs
+            if self._dtype_policy is not None:
+                self._read_kwargs = dict(self._sql_kwargs, dtype=_dtypes(
+                    self._dtype_policy, con or self._uri, self._sql_expr,
+                    self._sql_kwargs))
+        return self._read_kwargs
+
+    def _loader(self, engine, kwargs):
+        """pandas function, and what to pass it, to read the whole result"""
+        import pandas as pd
+        if kwargs.get("dtype") or (kwargs.get("columns") and not _is_table(
+                self._sql_expr, kwargs.get("schema"))):
+            # pandas only applies columns when reading a table, and dtype
+            # when reading a query
+            query = _select(self._sql_expr, kwargs,
+                            index=kwargs.get("index_col"), engine=engine)
+            return pd.read_sql, query, _query_kwargs(kwargs)
+        if kwargs.get("schema"):
+            return pd.read_sql_table, self._sql_expr, kwargs
+        return pd.read_sql, self._sql_expr, kwargs
+
+    def _load_new(self, previous, con=None):
+        """Rows with watermark beyond its largest value in previous
+
+        They are read with the types of previous, so that they concatenate
+        with it.
+        """
+        import sqlalchemy as sa
+        wm = self._watermark
+        engine, kwargs = _engine(con or self._uri, self._kwargs(con))
+        schema = kwargs.get("schema")
+        query = _select(self._sql_expr, kwargs,
+                        index=kwargs.get("index_col"), engine=engine)
+        values = previous.index if wm == previous.index.name else previous[wm]
+        if len(values):
+            last = _py_value(values.max())
+            col = _typed_column(engine, self._sql_expr, wm, schema, last)
+            query = query.where(col > sa.bindparam(
+                '_intake_sql_watermark', last, type_=col.type))
+        new = _read_sql(query, engine, _query_kwargs(kwargs), kind='load')
+        return _coerce_part(new, previous.iloc[:0])
+
+    def read_chunked(self, chunksize=None):
+        """
+        Iterate over the result as a sequence of dataframes
+
+        Uses a server-side cursor, where the backend supports it, so that
+        only one chunk is held in memory at a time; nothing is cached on
+        this source.
+
+        Parameters
+        ----------
+        chunksize: int or None
+            Maximum number of rows in each yielded dataframe; defaults to
+            the value in ``sql_kwargs``, else 100000.
+        """
+        engine, kwargs = _engine(self._uri, self._kwargs())
+        chunksize = chunksize or kwargs.pop("chunksize", None) or 100000
+        kwargs.pop("chunksize", None)
+        kwargs.pop("stream_results", None)
+        options = _stream_options(kwargs.pop("fetch_size", None) or chunksize)
+        loader, sql, kwargs = self._loader(engine, kwargs)
+        with engine.connect().execution_options(**options) as con:
+            for df in loader(sql, con, chunksize=chunksize, **kwargs):
+                yield df
+
+    def __iter__(self):
+        return self.read_chunked()
 
     def _get_schema(self):
-        if self._dataframe is None:
-            # TODO: could do read_sql with chunksize to get likely schema from
-            # first few records, rather than loading the whole thing
+        if self._dataframe is None and self._cache is not None:
+            self._dataframe = self._cache.get(self._cache_key())
+        if self._dataframe is None and (self._probe_rows is None
+                                        or _positional(self._sql_kwargs)):
             self._load()
+        if self._dataframe is not None:
+            df = self._dataframe
+            nrows = len(df)
+        else:
+            # types from the first few rows only; the full load happens
+            # on read()
+            df = probe_sql(self._uri, self._sql_expr, self._probe_rows,
+                           self._kwargs())
+            nrows = (count_sql(self._uri, self._sql_expr, self._sql_kwargs)
+                     if self._count_rows else None)
         return base.Schema(datashape=None,
-                           dtype={k: str(v) for k,v in self._dataframe.dtypes.items()},
-                           shape=self._dataframe.shape,
+                           dtype={k: str(v) for k,v in df.dtypes.items()},
+                           shape=(nrows, len(df.columns)),
                            npartitions=1,
                            extra_metadata={})
 
     def _get_partition(self, _):
         if self._dataframe is None:
-            self._load_metadata()
+            self._load()
+        # the schema then comes from the loaded frame, without a probe
+        self._load_metadata()
         return self._dataframe
 
     def read(self):
+        if self._dataframe is not None and self._watermark is not None:
+            # fetch only the rows appended since
+            self._load()
         return self._get_partition(None)
 
+    async def read_async(self):
+        """
+        Load the whole result without blocking the event loop
+
+        Uses the asyncio driver corresponding to the uri (e.g., aiosqlite or
+        asyncpg, see ``intake_sql.engines.async_url``), which must be
+        installed. As for ``read()``, the result is kept, and with a
+        watermark only rows appended since are fetched.
+        """
+        if self._dataframe is None or self._watermark is not None:
+            await _run_async(self._uri, self._load,
+                             self._sql_kwargs.get("engine_kwargs"))
+        return self._dataframe
+
+    async def read_partition_async(self, i):
+        """The single partition, as read_async()"""
+        return await self.read_async()
+
+    def to_arrow(self):
+        """
+        Fetch the whole result as a pyarrow.Table
+
+        Bypasses pandas; any index_col is returned as an ordinary column.
+        """
+        query = _select(self._sql_expr, self._sql_kwargs,
+                        index=self._sql_kwargs.get("index_col"))
+        return read_sql_arrow(query, self._uri,
+                              params=self._sql_kwargs.get("params"),
+                              **_arrow_kwargs(self._sql_kwargs))
+
     def to_ibis(self):
         """
         Create an ibis expression for the data source.
@@ -84,53 +281,207 @@ class SQLSource(base.DataSource):
 
 class SQLSourceAutoPartition(base.DataSource):
     """
-    SQL table reader with automatic partitioning
-
-    Only reads existing tables, not arbitrary SQL expressions.
+    SQL table or expression reader with automatic partitioning
 
     For partitioning, require to provide the column to be used, which should
     be indexed in the database. Can then provide list of boundaries, number
     of partitions or target partition size; see dask.dataframe.read_sql_table
     and examples for a list of possibilities.
 
+    An arbitrary SQL expression (joins, CTEs...) is wrapped as a sub-query,
+    and partitioned on one of its output columns in the same way.
+
     Parameters
     ----------
     uri: str or None
         Full connection string in sqlalchemy syntax
     table: str
-        Table to read
-    index: str
+        Table to read, or SQL expression
+    index: str or list of str
         Column to use for partitioning and as the index of the resulting
-        dataframe
+        dataframe. With ``partition_method='keyset'``, may be several
+        columns, e.g., a composite primary key, by which the rows are
+        ordered; the first becomes the index, and the divisions are unknown.
     sql_kwargs: dict
         Further arguments to pass to dask.dataframe.read_sql
+    divisions_method: str or None
+        How to choose the boundaries when ``npartitions`` is given in
+        sql_kwargs. If None, dask splits the range of the index linearly.
+        With 'stats', boundaries come from the database's statistics
+        histogram for the column, where available, or else 'quantile',
+        an ``NTILE`` query, giving partitions of equal numbers of rows
+        even for skewed values.
+    result_cache: str, dict or None
+        If given, partitions are stored in and re-read from files in a local
+        directory; either the path, or the arguments of
+        ``intake_sql.cache.ResultCache`` (path, ttl, max_bytes)
+    max_workers: int or None
+        If given, ``read()`` fetches this many partitions at a time on a
+        pool of threads, instead of using dask; see ``iter_partitions()``
+    columns: list of str or None
+        If given, only these columns (and the index) are selected from the
+        table; the same as ``columns`` in sql_kwargs
+    filters: list of tuples, list of lists of tuples, or None
+        Row filters in disjunctive normal form, as for the parquet readers,
+        e.g., ``[('a', '>', 1), ('b', 'in', ['x', 'y'])]``. They become the
+        WHERE clause of each partition's query, and partitions whose range
+        of the index cannot pass them are not read at all.
+    partition_method: 'range' or 'hash'
+        With 'range', each partition holds an interval of the index. With
+        'hash', partition i holds the rows for which a hash of the index,
+        modulo ``npartitions`` (which must be in sql_kwargs), is i; this
+        needs no boundaries, but the divisions are unknown. Databases without
+        a known hash function, such as SQLite, need an integer index.
+        Expressions with ``params`` cannot be range partitioned.
+        With 'keyset', the boundaries are found by seeking through the rows
+        in order of the index (see ``intake_sql.partition.keyset_bounds``),
+        giving partitions of equal numbers of rows for any orderable index,
+        including text, UUIDs and several columns, which cannot be divided
+        linearly. The number of partitions is ``npartitions`` in sql_kwargs,
+        or else estimated from ``bytes_per_chunk`` (default 256 MiB).
+    dtype_policy: None, 'compact' or dict
+        Compact dtypes for the columns, as for ``SQLSource``
+    plan_cache: str or None
+        Local directory in which to keep the divisions and types found when
+        planning the partitions, so that other instances (e.g., in a new
+        session or on workers) need not repeat the planning queries. A
+        stored plan is reused while the maximum of the index in the
+        database is unchanged; updates that keep it are not noticed. With
+        'keyset', the bounds are kept, and reused while both the maximum
+        of the (first) index column and the number of rows are unchanged.
     """
     name = 'sql_auto'
     version = __version__
     container = 'dataframe'
     partition_access = True
 
-    def __init__(self, uri, table, index, sql_kwargs={}, metadata={}):
+    def __init__(self, uri, table, index, sql_kwargs={}, metadata={},
+                 result_cache=None, divisions_method=None, max_workers=None,
+                 columns=None, filters=None, partition_method='range',
+                 dtype_policy=None, plan_cache=None):
         self._init_args = {
             'uri': uri,
             'sql_expr': table,
             'index': index,
             'sql_kwargs': sql_kwargs,
             'metadata': metadata,
+            'result_cache': result_cache,
+            'divisions_method': divisions_method,
+            'max_workers': max_workers,
+            'columns': columns,
+            'filters': filters,
+            'partition_method': partition_method,
+            'dtype_policy': dtype_policy,
+            'plan_cache': plan_cache,
         }
 
         self._uri = uri
         self._sql_expr = table
+        if columns:
+            sql_kwargs = dict(sql_kwargs, columns=columns)
         self._sql_kwargs = sql_kwargs
-        self._index = index
+        self._keys = [index] if isinstance(index, str) else list(index)
+        self._index = self._keys[0]
+        self._cache = make_cache(result_cache)
+        self._divisions_method = divisions_method
+        self._max_workers = max_workers
+        self._filters = filters
+        if partition_method not in ('range', 'hash', 'keyset'):
+            raise ValueError("partition_method must be 'range', 'hash' or "
+                             "'keyset', not %r" % (partition_method, ))
+        if partition_method == 'hash' and not sql_kwargs.get('npartitions'):
+            raise ValueError("Hash partitioning requires npartitions")
+        if (partition_method == 'range' and sql_kwargs.get('params')
+                and not _is_table(table, sql_kwargs.get('schema'))):
+            # dask plans without them
+            raise ValueError("Range partitioning cannot bind the params of "
+                             "an expression; use partition_method='hash'")
+        if partition_method != 'keyset' and len(self._keys) > 1:
+            raise ValueError("An index of several columns requires "
+                             "partition_method='keyset'")
+        self._partition_method = partition_method
+        self._dtype_policy = dtype_policy
+        self._plan_cache = make_plan_cache(plan_cache)
+        self._parts = None
         self._dataframe = None
 
         super(SQLSourceAutoPartition, self).__init__(metadata=metadata)
 
     def _load(self):
+        kwargs = {k: v for k, v in self._sql_kwargs.items()
+                  if k not in _DASK_TABLE_KWARGS or k == 'engine_kwargs'}
+        kwargs['index_col'] = self._index
+        if self._dtype_policy is not None:
+            kwargs['dtype'] = _dtypes(
+                self._dtype_policy, self._uri, self._sql_expr,
+                dict(self._sql_kwargs, index_col=self._index))
+        if self._partition_method == 'hash':
+            meta = self._head_meta(kwargs)
+            selects = self._hash_selects(meta)
+            divisions = (None, ) * (len(selects) + 1)
+        elif self._partition_method == 'keyset':
+            meta = self._head_meta(kwargs)
+            selects, divisions = self._keyset_selects(meta)
+        else:
+            # dask plans the divisions and finds the meta; the partitions
+            # are then read by load_part, using the shared engine of each
+            # worker
+            meta, divisions = self._planned()
+            selects, divisions = self._partition_selects(divisions)
+        if kwargs.get('dtype'):
+            from .dtypes import apply_dtypes
+            meta = apply_dtypes(meta, kwargs['dtype'])
+        self._divisions = divisions
+        self._parts = [dict(sql=q, engine=self._uri, where=None, kwargs=kwargs,
+                            meta=meta, cache=self._cache)
+                       for q in selects]
+        self._dataframe = _from_parts(self._parts, meta, divisions)
+
+    def _planned(self):
+        """meta and divisions, from the plan cache if still valid"""
+        if self._plan_cache is None:
+            planned = self._plan()
+            return planned._meta, planned.divisions
+        key = self._plan_cache.key(
+            self._uri, self._sql_expr,
+            dict(self._sql_kwargs, index=self._index,
+                 divisions_method=self._divisions_method))
+        token = self._plan_token()
+        plan = self._plan_cache.get(key, token)
+        if plan is None:
+            planned = self._plan()
+            plan = planned._meta, planned.divisions
+            self._plan_cache.put(key, token, *plan)
+        return plan
+
+    def _plan_token(self, count=False):
+        """Maximum of the index, which changes when rows are appended; with
+        count, also the number of rows"""
+        import sqlalchemy as sa
+        engine, _ = _engine(self._uri, self._sql_kwargs)
+        cols = [sa.func.max(sa.column(self._index))]
+        if count:
+            cols.append(sa.func.count())
+        query = sa.select(*cols).select_from(
+            _selectable(self._sql_expr, self._sql_kwargs.get('schema')))
+        with engine.connect() as con:
+            row = con.execute(query).first()
+        return list(row) if count else row[0]
+
+    def _plan(self):
+        """Dask dataframe for the whole table or expression"""
         import dask.dataframe as dd
-        self._dataframe = dd.read_sql_table(self._sql_expr, self._uri,
-                                            self._index, **self._sql_kwargs)
+        from .instrument import measure
+        with measure('plan', self._sql_expr, track=True, index=self._index):
+            kwargs = {k: v for k, v in self._plan_kwargs().items()
+                      if k not in _STREAM_KWARGS}
+            if _is_table(self._sql_expr, kwargs.get('schema')):
+                return dd.read_sql_table(self._sql_expr, self._uri,
+                                         self._index, **kwargs)
+            query = _select(self._sql_expr, kwargs, index=self._index)
+            kwargs = {k: v for k, v in kwargs.items()
+                      if k not in ('columns', 'schema')}
+            return dd.read_sql_query(query, self._uri, self._index, **kwargs)
 
     def _get_schema(self):
         if self._dataframe is None:
@@ -142,14 +493,215 @@ class SQLSourceAutoPartition(base.DataSource):
                            extra_metadata={})
 
     def _get_partition(self, i):
-        if self._dataframe is None:
-            self._load_metadata()
-        return self._dataframe.get_partition(i).compute()
+        if self._parts is None:
+            self._load()
+        return load_part(**self._parts[i])
+
+    def iter_partitions(self, max_workers=None):
+        """
+        Yield the partitions as pandas dataframes, in order
+
+        They are read concurrently on a bounded pool of threads, each with
+        its own connection, without needing a dask scheduler.
+
+        Parameters
+        ----------
+        max_workers: int or None
+            Number of partitions read at a time; defaults to the source's
+            ``max_workers``, else 4
+        """
+        self._load_metadata()
+        return iter_threaded(self._get_partition, range(self.npartitions),
+                             max_workers or self._max_workers or 4)
 
     def to_dask(self):
         self._get_schema()
         return self._dataframe
 
+    def _plan_kwargs(self):
+        """sql_kwargs for dask, with divisions from statistics if requested"""
+        kwargs = self._sql_kwargs
+        if (self._divisions_method and kwargs.get('npartitions')
+                and kwargs.get('divisions') is None):
+            from .partition import stats_divisions
+            engine, _ = _engine(self._uri, kwargs)
+            divisions = stats_divisions(
+                engine, self._sql_expr, self._index, kwargs['npartitions'],
+                schema=kwargs.get('schema'), method=self._divisions_method)
+            kwargs = {k: v for k, v in kwargs.items()
+                      if k not in ('npartitions', 'bytes_per_chunk', 'limits')}
+            kwargs['divisions'] = divisions
+        return kwargs
+
+    def _partition_selects(self, divisions):
+        """
+        One SELECT statement per partition, from the dask divisions
+
+        Returns the statements and the divisions of the partitions kept
+        after pruning by the filters.
+        """
+        from .partition import filters_clause, prune_partitions
+        engine, _ = _engine(self._uri, self._sql_kwargs)
+        query = _select(self._sql_expr, self._sql_kwargs, index=self._index,
+                        engine=engine)
+        if self._filters:
+            query = query.where(filters_clause(self._filters))
+        if divisions[0] is None:
+            return [query], divisions
+        index = _typed_column(engine, self._sql_expr, self._index,
+                              self._sql_kwargs.get('schema'), divisions[0])
+        nparts = len(divisions) - 1
+        # keep one partition even if none can match, to give an empty frame
+        keep = prune_partitions(self._filters, self._index, divisions) or [0]
+        selects = []
+        for i in keep:
+            # same bounds as dask.dataframe.read_sql_table
+            lower = _py_value(divisions[i])
+            upper = _py_value(divisions[i + 1])
+            last = i == nparts - 1
+            selects.append(query.where(
+                index >= lower, index <= upper if last else index < upper))
+        # each kept partition lies between its lower bound and the next one's
+        kept = [divisions[i] for i in keep] + [divisions[keep[-1] + 1]]
+        return selects, tuple(kept)
+
+    def _hash_selects(self, meta):
+        """One SELECT statement per hash bucket of the index"""
+        import sqlalchemy as sa
+        from .partition import HASH_DIALECTS, filters_clause, hash_bucket
+        engine, _ = _engine(self._uri, self._sql_kwargs)
+        if engine.dialect.name not in HASH_DIALECTS:
+            # the index itself is taken modulo npartitions
+            schema = self._sql_kwargs.get('schema')
+            if _is_table(self._sql_expr, schema):
+                numeric = isinstance(_typed_column(
+                    engine, self._sql_expr, self._index, schema).type,
+                    (sa.Integer, sa.Numeric))
+            else:
+                numeric = meta.index.dtype.kind in 'iuf'
+            if not numeric:
+                raise ValueError(
+                    "Hash partitioning on %s needs a numeric index; %s is "
+                    "not" % (engine.dialect.name, self._index))
+        query = _select(self._sql_expr, self._sql_kwargs, index=self._index,
+                        engine=engine)
+        if self._filters:
+            query = query.where(filters_clause(self._filters))
+        n = self._sql_kwargs['npartitions']
+        bucket = hash_bucket(self._index, n, engine.dialect.name)
+        return [query.where(bucket == i) for i in range(n)]
+
+    def _keyset_selects(self, meta):
+        """
+        One SELECT statement per partition between keyset bounds
+
+        For a single index column, the bounds (and the maximum) are the
+        divisions, of the type of the index in meta, and the statements are
+        as for 'range'; for several, each partition is bounded by
+        comparisons of the tuple of key columns, and the divisions are
+        unknown.
+        """
+        import pandas as pd
+        from .instrument import measure
+        from .partition import filters_clause, key_compare
+        engine, _ = _engine(self._uri, self._sql_kwargs)
+        where = filters_clause(self._filters) if self._filters else None
+        with measure('plan', self._sql_expr, track=True, index=self._index):
+            bounds, top = self._keyset_planned(engine, where)
+        if len(self._keys) == 1:
+            if not bounds:
+                return self._partition_selects((None, None))
+            divisions = pd.Series([b[0] for b in bounds] + [top],
+                                  dtype=object)
+            try:
+                divisions = divisions.astype(meta.index.dtype)
+            except (TypeError, ValueError):
+                pass
+            return self._partition_selects(tuple(divisions.tolist()))
+        query = _select(self._sql_expr, self._sql_kwargs, index=self._index,
+                        engine=engine)
+        if where is not None:
+            query = query.where(where)
+        selects = []
+        for i, lower in enumerate(bounds):
+            part = query.where(key_compare(self._keys, lower, '>='))
+            if i < len(bounds) - 1:
+                part = part.where(key_compare(self._keys, bounds[i + 1], '<'))
+            selects.append(part)
+        selects = selects or [query]
+        return selects, (None, ) * (len(selects) + 1)
+
+    def _keyset_planned(self, engine, where):
+        """Keyset bounds, and the maximum of a single index column, from
+        the plan cache if still valid"""
+        import sqlalchemy as sa
+        from .partition import keyset_bounds
+        if self._plan_cache is not None:
+            key = self._plan_cache.key(
+                self._uri, self._sql_expr,
+                dict(self._sql_kwargs, index=self._keys,
+                     partition_method='keyset', filters=self._filters))
+            token = self._plan_token(count=True)
+            plan = self._plan_cache.get_bounds(key, token)
+            if plan is not None:
+                return plan
+        schema = self._sql_kwargs.get('schema')
+        bounds = keyset_bounds(engine, self._sql_expr, self._keys,
+                               self._keyset_npartitions(), schema=schema,
+                               where=where)
+        top = None
+        if len(self._keys) == 1 and bounds:
+            col = sa.column(self._index)
+            query = sa.select(col).select_from(
+                _selectable(self._sql_expr, schema))
+            if where is not None:
+                query = query.where(where)
+            with engine.connect() as con:
+                top = con.execute(
+                    query.order_by(col.desc()).limit(1)).scalar()
+        if self._plan_cache is not None:
+            self._plan_cache.put_bounds(key, token, bounds, top)
+        return bounds, top
+
+    def _keyset_npartitions(self):
+        """npartitions from sql_kwargs, or to make about bytes_per_chunk"""
+        if self._sql_kwargs.get('npartitions'):
+            return self._sql_kwargs['npartitions']
+        from dask.utils import parse_bytes
+        chunk = parse_bytes(self._sql_kwargs.get('bytes_per_chunk',
+                                                 '256 MiB'))
+        head = probe_sql(self._uri, self._sql_expr,
+                         self._sql_kwargs.get('head_rows', 5),
+                         dict(self._sql_kwargs, index_col=self._index))
+        if not len(head):
+            return 1
+        row_bytes = head.memory_usage(deep=True, index=True).sum() / len(head)
+        rows = count_sql(self._uri, self._sql_expr, self._sql_kwargs)
+        return max(1, int(-(-rows * row_bytes // chunk)))
+
+    def _head_meta(self, kwargs):
+        """Meta given in sql_kwargs, or else from the first rows"""
+        meta = self._sql_kwargs.get('meta')
+        if meta is not None:
+            from dask.dataframe.utils import make_meta
+            return make_meta(meta)
+        kwargs = dict(kwargs, columns=self._sql_kwargs.get('columns'),
+                      schema=self._sql_kwargs.get('schema'))
+        head = probe_sql(self._uri, self._sql_expr,
+                         self._sql_kwargs.get('head_rows', 5), kwargs)
+        return head.iloc[:0]
+
+    def to_arrow(self):
+        """
+        Fetch the whole table as a pyarrow.Table, partition by partition
+
+        The index column is returned as an ordinary column.
+        """
+        self._get_schema()
+        kwargs = _arrow_kwargs(self._sql_kwargs)
+        return _concat_arrow([read_sql_arrow(part['sql'], self._uri, **kwargs)
+                              for part in self._parts])
+
     def to_ibis(self):
         """
         Create an ibis expression for the data source.
@@ -167,12 +719,15 @@ class SQLSourceAutoPartition(base.DataSource):
         else:
             return client.table(self._sql_expr, **schema_kwargs)
 
-
     def read(self):
         self._get_schema()
+        if self._max_workers:
+            import pandas as pd
+            return pd.concat(list(self.iter_partitions()))
         return self._dataframe.compute()
 
     def _close(self):
+        self._parts = None
         self._dataframe = None
 
 
@@ -187,9 +742,11 @@ class SQLSourceManualPartition(base.DataSource):
     clauses to be applied to the main SQL expression, or a string to be
     formatted with a set of values to produce the comlete SQL expressions.
 
-    Note, if not supplying a `meta` argument, dask will load the first
-    partition in order to determine the schema. If some of the partitions are
-    empty, loading without a meta will likely fail.
+    If not supplying a `meta` argument (in sql_kwargs), the schema is found
+    from the first few rows of the SQL expression, without its partitioning
+    clauses. With ``probe_rows=None``, dask will instead load the first
+    partition in order to determine the schema; if some of the partitions
+    are empty, loading without a meta will likely fail.
 
     Parameters
     ----------
@@ -204,9 +761,29 @@ class SQLSourceManualPartition(base.DataSource):
     where_template: str (optional)
         Template for generating partition selection clauses, using the
         values from where_values, e.g.,
-        `"WHERE index_col >= {} AND index_col < {}"`
+        `"WHERE index_col >= {} AND index_col < {}"`. If the template
+        instead has named bind parameters, e.g.,
+        `"WHERE index_col >= :lo AND index_col < :hi"`, the values (tuples
+        in order of appearance, or dicts) are sent to the database as
+        parameters, so that every partition runs the same SQL text.
     sql_kwargs: dict
         Further arguments to pass to pd.read_sql_query
+    result_cache: str, dict or None
+        If given, partitions are stored in and re-read from files in a local
+        directory; either the path, or the arguments of
+        ``intake_sql.cache.ResultCache`` (path, ttl, max_bytes)
+    probe_rows: int or None
+        Number of rows of sql_expr to fetch, with a ``LIMIT`` query, to infer
+        the meta when it is not given; not used if ``params`` in sql_kwargs
+        are positional (a list or tuple)
+    max_workers: int or None
+        If given, ``read()`` fetches this many partitions at a time on a
+        pool of threads, instead of using dask; see ``iter_partitions()``
+    columns: list of str or None
+        If given, each partition's SQL is wrapped to select only these
+        columns (and any index_col)
+    dtype_policy: None, 'compact' or dict
+        Compact dtypes for the columns, as for ``SQLSource``
     """
     name = 'sql_manual'
     version = __version__
@@ -214,7 +791,9 @@ class SQLSourceManualPartition(base.DataSource):
     partition_access = True
 
     def __init__(self, uri, sql_expr, where_values, where_template=None,
-                 sql_kwargs={}, metadata={}):
+                 sql_kwargs={}, metadata={}, result_cache=None,
+                 probe_rows=100, max_workers=None, columns=None,
+                 dtype_policy=None):
         self._init_args = {
             'uri': uri,
             'sql_expr': sql_expr,
@@ -222,6 +801,11 @@ class SQLSourceManualPartition(base.DataSource):
             'where_tmp': where_template,
             'sql_kwargs': sql_kwargs,
             'metadata': metadata,
+            'result_cache': result_cache,
+            'probe_rows': probe_rows,
+            'max_workers': max_workers,
+            'columns': columns,
+            'dtype_policy': dtype_policy,
         }
 
         self._uri = uri
@@ -230,56 +814,621 @@ class SQLSourceManualPartition(base.DataSource):
         self._sql_kwargs = sql_kwargs
         self._where = where_values
         self._where_tmp = where_template
+        self._cache = make_cache(result_cache)
+        self._probe_rows = probe_rows
+        self._max_workers = max_workers
+        self._columns = columns
+        self._dtype_policy = dtype_policy
+        self._parts = None
         self._dataframe = None
         self._meta = self._sql_kwargs.pop('meta', None)
 
         super(SQLSourceManualPartition, self).__init__(metadata=metadata)
 
-    def _load(self):
-        self._dataframe = read_sql_query(self._uri, self._sql_expr,
-                                         self._where, where_tmp=self._where_tmp,
-                                         meta=self._meta,
-                                         kwargs=self._sql_kwargs)
+    def _load(self, con=None):
+        """Plan the partitions; with con, query on it, not the engine"""
+        import pandas as pd
+        kwargs = self._sql_kwargs
+        if self._dtype_policy is not None:
+            kwargs = dict(kwargs, dtype=_dtypes(
+                self._dtype_policy, con or self._uri, self._sql_expr,
+                dict(kwargs, columns=self._columns)))
+        meta = self._meta
+        if (meta is None and self._probe_rows is not None
+                and not _positional(kwargs)):
+            meta = self._probe_meta(kwargs, con)
+        elif meta is not None and not isinstance(meta, pd.DataFrame):
+            from dask.dataframe.utils import make_meta
+            meta = make_meta(meta)
+        if meta is not None and self._columns:
+            meta = meta[[c for c in meta.columns if c in self._columns]]
+        if meta is not None and kwargs.get('dtype'):
+            from .dtypes import apply_dtypes
+            meta = apply_dtypes(meta, kwargs['dtype'])
+        self._parts = _manual_parts(self._uri, self._sql_expr, self._where,
+                                    self._where_tmp, meta, kwargs,
+                                    self._cache)
+        if meta is None:
+            # dask computes the first partition to find the types
+            self._dataframe = _from_parts(self._parts, columns=self._columns)
+            meta = self._dataframe._meta
+        self._meta_df = meta
+
+    def _probe_meta(self, kwargs, con=None):
+        """Empty frame with the types of the first rows of the query"""
+        if self._columns:
+            kwargs = dict(kwargs, columns=self._columns)
+        if self._cache is not None:
+            key = self._cache.key(self._uri, self._sql_expr, kwargs,
+                                  ['probe', self._probe_rows])
+            head = self._cache.get(key)
+            if head is not None:
+                return head.iloc[:0]
+        head = probe_sql(con or self._uri, self._sql_expr, self._probe_rows,
+                         kwargs)
+        if self._cache is not None:
+            self._cache.put(key, head)
+        return head.iloc[:0]
 
     def _get_schema(self):
-        if self._dataframe is None:
+        if self._parts is None:
             self._load()
         return base.Schema(datashape=None,
-                           dtype={k: str(v) for k,v in self._dataframe.dtypes.items()},
-                           shape=(None, len(self._dataframe.columns)),
-                           npartitions=self._dataframe.npartitions,
+                           dtype={k: str(v) for k,v in self._meta_df.dtypes.items()},
+                           shape=(None, len(self._meta_df.columns)),
+                           npartitions=len(self._parts),
                            extra_metadata={})
 
     def _get_partition(self, i):
-        if self._dataframe is None:
-            self._load_metadata()
-        return self._dataframe.get_partition(i).compute()
+        if self._parts is None:
+            self._load()
+        return load_part(columns=self._columns, **self._parts[i])
+
+    def iter_partitions(self, max_workers=None):
+        """
+        Yield the partitions as pandas dataframes, in order
+
+        They are read concurrently on a bounded pool of threads, each with
+        its own connection, without needing dask.
+
+        Parameters
+        ----------
+        max_workers: int or None
+            Number of partitions read at a time; defaults to the source's
+            ``max_workers``, else 4
+        """
+        self._load_metadata()
+        return iter_threaded(self._get_partition, range(self.npartitions),
+                             max_workers or self._max_workers or 4)
 
     def to_dask(self):
         self._get_schema()
+        if self._dataframe is None:
+            self._dataframe = _from_parts(self._parts, self._meta_df,
+                                          columns=self._columns)
         return self._dataframe
 
+    def to_arrow(self):
+        """
+        Fetch all partitions as a single pyarrow.Table
+
+        Any index_col is returned as an ordinary column.
+        """
+        where, params = _where_params(self._where, self._where_tmp)
+        index_col = self._sql_kwargs.get("index_col")
+        sql = [self._sql_expr + ' ' + w for w in where]
+        if self._columns:
+            sql = [_project(q, self._columns, index_col) for q in sql]
+        return _concat_arrow([
+            read_sql_arrow(q, self._uri,
+                           params=_merge_params(self._sql_kwargs, p),
+                           **_arrow_kwargs(self._sql_kwargs))
+            for q, p in zip(sql, params)])
+
     def read(self):
         self._get_schema()
-        return self._dataframe.compute()
+        if self._max_workers:
+            import pandas as pd
+            return pd.concat(list(self.iter_partitions()))
+        return self.to_dask().compute()
+
+    async def _load_metadata_async(self):
+        if self._parts is None:
+            await _run_async(self._uri, self._load,
+                             self._sql_kwargs.get("engine_kwargs"))
+        self._load_metadata()
+
+    async def read_partition_async(self, i):
+        """
+        Read one partition without blocking the event loop
+
+        Uses the asyncio driver corresponding to the uri (e.g., aiosqlite or
+        asyncpg, see ``intake_sql.engines.async_url``), which must be
+        installed.
+        """
+        await self._load_metadata_async()
+        return await load_part_async(columns=self._columns, **self._parts[i])
+
+    async def read_async(self, max_concurrency=None):
+        """
+        Read all partitions concurrently on the running event loop
+
+        Parameters
+        ----------
+        max_concurrency: int or None
+            Number of partitions being read at a time; defaults to the
+            source's ``max_workers``, else 4. Keep this within the size of
+            the connection pool (see ``engine_kwargs``).
+        """
+        import asyncio
+        import pandas as pd
+        await self._load_metadata_async()
+        limit = asyncio.Semaphore(max_concurrency or self._max_workers or 4)
+
+        async def read_one(i):
+            async with limit:
+                return await self.read_partition_async(i)
+        return pd.concat(await asyncio.gather(
+            *[read_one(i) for i in range(self.npartitions)]))
 
     def _close(self):
+        self._parts = None
         self._dataframe = None
 
 
-def load_part(sql, engine, where, kwargs, meta=None):
+# arguments for _read_sql, not pandas.read_sql
+_STREAM_KWARGS = ('fetch_size', 'stream_results')
+
+# arguments of dask.dataframe.read_sql_table not meant for pandas.read_sql
+_DASK_TABLE_KWARGS = ('npartitions', 'divisions', 'bytes_per_chunk', 'limits',
+                      'head_rows', 'columns', 'schema', 'meta', 'engine_kwargs')
+
+
+def _dtypes(policy, uri, sql_expr, kwargs):
+    """pandas dtype argument implied by dtype_policy, see intake_sql.dtypes"""
+    from .dtypes import policy_dtypes
+    engine, _ = _engine(uri, kwargs)
+    return policy_dtypes(policy, engine, sql_expr, kwargs)
+
+
+def _engine(uri, kwargs):
+    """Shared engine for uri, and a copy of kwargs without engine_kwargs
+
+    uri may already be an engine or connection, which is passed through.
+    """
+    kwargs = dict(kwargs or {})
+    engine_kwargs = kwargs.pop('engine_kwargs', None) or {}
+    if isinstance(uri, str):
+        uri = get_engine(uri, **engine_kwargs)
+    return uri, kwargs
+
+
+def _is_table(sql_expr, schema=None):
+    return bool(schema) or len(sql_expr.split()) == 1
+
+
+def _selectable(sql_expr, schema=None):
+    """Table name or arbitrary SQL expression as a SQLAlchemy FROM clause"""
+    import sqlalchemy as sa
+    if _is_table(sql_expr, schema):
+        return sa.table(sql_expr, schema=schema)
+    # a terminating semicolon is not allowed within a sub-query
+    return sa.text(sql_expr.strip().rstrip(';')).columns().subquery(
+        '_intake_sql_q')
+
+
+def _typed_column(engine, sql_expr, name, schema=None, value=None):
+    """
+    Column for comparison with values from pandas, such as divisions
+
+    A table's column has its reflected type, so that values are converted
+    as the database stores them (e.g., datetimes as text in SQLite); a
+    column of an expression is typed only for datetime values.
+    """
+    import datetime
+    import sqlalchemy as sa
+    if _is_table(sql_expr, schema):
+        for col in sa.inspect(engine).get_columns(sql_expr, schema=schema):
+            if col['name'] == name:
+                return sa.column(name, col['type'])
+    if isinstance(value, datetime.datetime):
+        return sa.column(name, sa.DateTime())
+    return sa.column(name)
+
+
+def _py_value(value):
+    """Plain Python equivalent of a pandas or numpy scalar, for binding"""
+    if hasattr(value, 'to_pydatetime'):
+        return value.to_pydatetime()
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+def _positional(kwargs):
+    """Whether the query has positional parameters (e.g., ``?``), which
+    cannot be bound when it is wrapped as a sub-query"""
+    return isinstance((kwargs or {}).get('params'), (list, tuple))
+
+
+def _query_kwargs(kwargs):
+    """Those of pandas.read_sql arguments valid for a SELECT statement"""
+    return {k: v for k, v in kwargs.items()
+            if k not in ('schema', 'columns', 'chunksize')}
+
+
+def probe_sql(uri, sql_expr, nrows, kwargs=None):
+    """
+    Read only the first few rows of a table or SQL expression
+
+    The expression is wrapped as a sub-query with a ``LIMIT``, so that the
+    cost does not depend on the size of the full result. Useful for
+    finding the column names and likely types of the output; the columns
+    of a table have their reflected types, as when reading the whole table.
+
+    Parameters
+    ----------
+    uri: str
+        connection string (sql sqlalchemy documentation)
+    sql_expr: str
+        Table name or SQL query
+    nrows: int
+        Maximum number of rows to fetch
+    kwargs: dict
+        Arguments as would be passed to pandas.read_sql for the full read
+    """
+    engine, kwargs = _engine(uri, kwargs)
+    query = _select(sql_expr, kwargs, index=kwargs.get('index_col'),
+                    engine=engine)
+    return _read_sql(query.limit(nrows), engine, _query_kwargs(kwargs),
+                     kind='probe')
+
+
+def _select(sql_expr, kwargs, index=None, engine=None):
+    """SELECT statement for the whole of a table or SQL expression
+
+    Includes only the ``columns`` given in kwargs (plus the index), if any.
+    Given an engine, a table is reflected, and its columns selected with
+    their types, so that values (e.g., SQLite's dates and booleans) are
+    converted as by pandas.read_sql_table.
+    """
+    import sqlalchemy as sa
+    columns = list(kwargs.get('columns') or [])
+    if columns:
+        index = [index] if isinstance(index, str) else list(index or [])
+        columns = [c for c in index if c not in columns] + columns
+    schema = kwargs.get('schema')
+    if engine is not None and _is_table(sql_expr, schema):
+        table = sa.Table(sql_expr, sa.MetaData(), schema=schema,
+                         autoload_with=engine, resolve_fks=False)
+        return sa.select(*[table.c[c] if c in table.c else sa.column(c)
+                           for c in columns] or table.c).select_from(table)
+    return sa.select(*[sa.column(c) for c in columns] or
+                     [sa.literal_column('*')]).select_from(
+        _selectable(sql_expr, kwargs.get('schema')))
+
+
+def count_sql(uri, sql_expr, kwargs=None):
+    """Number of rows in a table or SQL expression, by ``COUNT(*)``"""
+    import pandas as pd
+    import sqlalchemy as sa
+    engine, kwargs = _engine(uri, kwargs)
+    query = sa.select(sa.func.count()).select_from(
+        _selectable(sql_expr, kwargs.get('schema')))
+    return int(pd.read_sql(query, engine,
+                           params=kwargs.get('params')).iloc[0, 0])
+
+
+def read_sql_arrow(sql, uri, params=None, batch_size=65536,
+                   engine_kwargs=None, stream_results=False):
+    """
+    Execute a query and fetch the result directly into arrow
+
+    If the DBAPI cursor of the driver can itself produce arrow data (as
+    ADBC drivers do, with ``fetch_arrow_table``), that is used; otherwise
+    rows are fetched ``batch_size`` at a time and transposed into columns,
+    without making any intermediate pandas objects.
+
+    Parameters
+    ----------
+    sql: str or SQLAlchemy selectable
+        Query to execute
+    uri: str
+        connection string (sql sqlalchemy documentation)
+    params: dict or None
+        Values for any bound parameters in the query
+    batch_size: int
+        Number of rows to convert at a time, when the driver does not
+        support arrow
+    engine_kwargs: dict or None
+        Options for the shared SQLAlchemy engine, see ``get_engine``
+    stream_results: bool
+        Whether to use a server-side cursor, so that the driver holds only
+        about batch_size rows at a time
+
+    Returns
+    -------
+    pyarrow.Table
+    """
+    import pyarrow as pa
+    import sqlalchemy as sa
+    if isinstance(sql, str):
+        sql = sa.text(sql)
+    engine = get_engine(uri, **engine_kwargs or {})
+    with engine.connect() as con:
+        if stream_results:
+            con = con.execution_options(**_stream_options(batch_size))
+        result = con.execute(sql, params or {})
+        if hasattr(result.cursor, 'fetch_arrow_table'):
+            return result.cursor.fetch_arrow_table()
+        names = list(result.keys())
+        tables = []
+        while True:
+            rows = result.fetchmany(batch_size)
+            if not rows:
+                break
+            tables.append(pa.Table.from_arrays(
+                [pa.array(col) for col in zip(*rows)], names=names))
+    if not tables:
+        return pa.Table.from_arrays(
+            [pa.array([], type=pa.null()) for _ in names], names=names)
+    return _concat_arrow(tables)
+
+
+def _arrow_kwargs(kwargs):
+    """Arguments for read_sql_arrow from a source's sql_kwargs"""
+    fetch_size = kwargs.get('fetch_size')
+    return dict(engine_kwargs=kwargs.get('engine_kwargs'),
+                batch_size=fetch_size or 65536,
+                stream_results=bool(kwargs.get('stream_results') or fetch_size))
+
+
+def _concat_arrow(tables):
+    """Concatenate tables whose inferred types may differ, e.g., all-null,
+    or integer in one batch and float in another"""
+    import pyarrow as pa
+    schemas = [t.schema for t in tables]
+    try:
+        schema = pa.unify_schemas(schemas, promote_options='permissive')
+    except TypeError:
+        # pyarrow < 14 only unifies null with other types
+        schema = pa.unify_schemas(schemas)
+    return pa.concat_tables([t.cast(schema) for t in tables])
+
+
+def _where_params(where, where_tmp=None):
+    """Partition clauses and their bind parameters (or Nones)
+
+    Values are formatted into where_tmp, unless it has named bind
+    parameters, in which case the clause is the template itself.
+    """
+    import re
+    nones = [None] * len(where)
+    if where_tmp is None:
+        return list(where), nones
+    # the same pattern as sqlalchemy.text uses
+    names = list(dict.fromkeys(re.findall(r'(?<![:\w\x5c]):(\w+)(?!:)',
+                                          where_tmp)))
+    if not names:
+        return [where_tmp.format(*values) for values in where], nones
+    params = [dict(values) if isinstance(values, dict)
+              else dict(zip(names, values)) for values in where]
+    return [where_tmp] * len(where), params
+
+
+def _merge_params(kwargs, params):
+    """Bind parameters of the main query, updated with those of a partition"""
+    if params is None:
+        return kwargs.get('params')
+    return dict(kwargs.get('params') or {}, **params)
+
+
+def load_part(sql, engine, where, kwargs, meta=None, cache=None, params=None,
+              columns=None):
+    """
+    Read one partition into pandas
+
+    Parameters
+    ----------
+    sql: str or SQLAlchemy selectable
+        Query to execute
+    engine: str or SQLAlchemy engine
+        If a connection string, the shared engine for it is used, made with
+        any ``engine_kwargs`` in kwargs
+    where: str or None
+        Clause to append to a string sql, selecting this partition
+    kwargs: dict
+        Passed to pandas.read_sql
+    meta: dataframe or None
+        Zero-length version of the output, to which types are coerced
+    cache: ResultCache or None
+        If given, the partition is read from here when present, and
+        stored here otherwise
+    params: dict or None
+        Values of named bind parameters (``:name``) in the where clause
+    columns: list of str or None
+        If given, the query is narrowed to select only these columns (and
+        any index_col)
+    """
+    df = None
+    if cache is not None:
+        key = cache.key(engine, sql, kwargs, [where, params, columns])
+        df = cache.get(key)
+    if df is None:
+        engine, kwargs = _engine(engine, kwargs)
+        sql, kwargs = _part_query(sql, where, kwargs, params, columns)
+        df = _read_sql(sql, engine, kwargs, kind='partition', where=where,
+                       params=params)
+        if cache is not None:
+            cache.put(key, df)
+    return _coerce_part(df, meta, columns)
+
+
+async def load_part_async(sql, engine, where, kwargs, meta=None, cache=None,
+                          params=None, columns=None):
+    """
+    Read one partition into pandas, awaiting an asyncio driver
+
+    Arguments as for ``load_part``, except that engine must be a connection
+    string; the shared asyncio engine for it is used.
+    """
+    df = None
+    if cache is not None:
+        key = cache.key(engine, sql, kwargs, [where, params, columns])
+        df = cache.get(key)
+    if df is None:
+        kwargs = dict(kwargs)
+        engine_kwargs = kwargs.pop('engine_kwargs', None)
+        sql, kwargs = _part_query(sql, where, kwargs, params, columns)
+        df = await _run_async(
+            engine, lambda con: _read_sql(sql, con, kwargs, kind='partition',
+                                          where=where, params=params),
+            engine_kwargs)
+        if cache is not None:
+            cache.put(key, df)
+    return _coerce_part(df, meta, columns)
+
+
+def _stream_options(fetch_size=None):
+    """Execution options for a server-side cursor fetching in batches"""
+    return {'stream_results': True, 'yield_per': fetch_size or 10000}
+
+
+def _read_sql(sql, engine, kwargs, reader=None, kind='query', **info):
+    """
+    Call reader (by default, pandas.read_sql) with kwargs
+
+    If kwargs has ``fetch_size`` or ``stream_results``, rows are fetched in
+    batches from a server-side cursor, and the dataframe concatenated from
+    those; otherwise the driver may buffer the whole result before pandas
+    sees any of it.
+
+    The query is reported as an event of the given kind, with info, to any
+    instrumentation; see ``intake_sql.instrument``.
+    """
+    import time
+    import sqlalchemy as sa
+    from .instrument import measure
+    with measure(kind, sql, **info) as event:
+        if isinstance(engine, sa.engine.Connection):
+            df = _read_con(sql, engine, kwargs, reader, event)
+        else:
+            start = time.perf_counter()
+            with engine.connect() as con:
+                if event is not None:
+                    event['connect'] = time.perf_counter() - start
+                df = _read_con(sql, con, kwargs, reader, event)
+        if event is not None:
+            event['rows'] = len(df)
+            event['bytes'] = int(df.memory_usage().sum())
+    return df
+
+
+def _read_con(sql, con, kwargs, reader=None, event=None):
+    """_read_sql on a connection"""
     import pandas as pd
-    sql = sql + ' ' + where
-    df = pd.read_sql(sql, engine, **kwargs)
+    from .instrument import attach
+    reader = reader or pd.read_sql
+    kwargs = dict(kwargs)
+    fetch_size = kwargs.pop('fetch_size', None)
+    with attach(con, event):
+        if not (kwargs.pop('stream_results', None) or fetch_size):
+            return reader(sql, con, **kwargs)
+        options = _stream_options(fetch_size)
+        chunks = list(reader(sql, con.execution_options(**options),
+                             chunksize=options['yield_per'], **kwargs))
+    df = pd.concat(chunks) if len(chunks) > 1 else chunks[0]
+    if isinstance(kwargs.get('dtype'), dict):
+        # categories of separate batches do not combine
+        from .dtypes import apply_dtypes
+        df = apply_dtypes(df, kwargs['dtype'])
+    return df
+
+
+def _part_query(sql, where, kwargs, params=None, columns=None):
+    """The query of a partition, and the arguments for pandas to run it"""
+    import sqlalchemy as sa
+    if where:
+        sql = sql + ' ' + where
+    if params is not None:
+        kwargs = dict(kwargs, params=_merge_params(kwargs, params))
+        sql = sa.text(sql)
+    if columns is not None:
+        sql = _project(sql, columns, kwargs.get('index_col'))
+    return sql, kwargs
+
+
+def _coerce_part(df, meta=None, columns=None):
+    """df with the types of meta, narrowed to columns"""
+    if meta is not None and columns is not None:
+        meta = meta[[c for c in meta.columns if c in columns]]
     if meta is not None:
         if df.empty:
             df = meta
         else:
-            df = df.astype(meta.dtypes.to_dict(), copy=False)
+            dtypes = meta.dtypes.to_dict()
+            for col, dtype in dtypes.items():
+                # meta from a probe may not have seen the nulls of a column
+                if dtype.kind in 'iub' and col in df and df[col].hasnans:
+                    dtypes[col] = 'float64' if dtype.kind != 'b' else 'object'
+            df = df.astype(dtypes, copy=False)
     return df
 
 
-def read_sql_query(uri, sql, where, where_tmp=None, meta=None, kwargs=None):
+async def _run_async(uri, func, engine_kwargs=None):
+    """
+    Call func with a connection from the shared asyncio engine for uri
+
+    func is ordinary blocking code, such as pandas.read_sql, but runs on the
+    event loop: SQLAlchemy awaits each of its database calls in turn.
+    """
+    from .engines import get_async_engine
+    engine = get_async_engine(uri, **engine_kwargs or {})
+    async with engine.connect() as con:
+        return await con.run_sync(func)
+
+
+def _project(sql, columns, index_col=None):
+    """Narrow a query (string or selectable) to the given columns"""
+    import sqlalchemy as sa
+    index = [index_col] if isinstance(index_col, str) else list(index_col or [])
+    names = [c for c in index if c not in columns] + list(columns)
+    if isinstance(sql, str):
+        sql = sa.text(sql)
+    if isinstance(sql, sa.TextClause):
+        return sa.select(*[sa.column(c) for c in names]).select_from(
+            sql.columns().subquery('_intake_sql_q'))
+    # keep the types of columns already selected, e.g., from reflection
+    selected = {c.name: c for c in sql.selected_columns}
+    return sql.with_only_columns(*[selected.get(c, sa.column(c))
+                                   for c in names])
+
+
+class PartitionReader(object):
+    """
+    Callable reading one partition, given its arguments for ``load_part``
+
+    Implements dask's ``DataFrameIOFunction`` protocol, so that when only
+    some columns of a dask dataframe made with it are used, the SQL of every
+    partition selects only those columns.
+    """
+
+    def __init__(self, columns=None):
+        self._columns = columns
+
+    @property
+    def columns(self):
+        return self._columns
+
+    def project_columns(self, columns):
+        return PartitionReader(list(columns))
+
+    def __call__(self, part):
+        return load_part(**dict(part, columns=self._columns))
+
+
+def read_sql_query(uri, sql, where, where_tmp=None, meta=None, kwargs=None,
+                   cache=None):
     """
     Create a dask dataframe from SQL using explicit partitioning
 
@@ -296,24 +1445,69 @@ def read_sql_query(uri, sql, where, where_tmp=None, meta=None, kwargs=None):
     where_tmp: str (optional)
         Template for generating partition selection clauses, using the
         values from where_values, e.g.,
-        `"WHERE index_col >= {} AND index_col < {}"`
+        `"WHERE index_col >= {} AND index_col < {}"`. If the template
+        instead has named bind parameters, e.g.,
+        `"WHERE index_col >= :lo AND index_col < :hi"`, the values (tuples
+        in order of appearance, or dicts) are sent to the database as
+        parameters, so that every partition runs the same SQL text.
     meta: dataframe metadata (optional)
         If given, a zero-length version of the dataframe structure, with
         index and column names and types correctly specified. Can also be
         the same information in dictionary or tuple of tuples format
     kwargs: dict
         Any further parameters to pass to pd.read_sql_query, see
-        its documentation
+        its documentation; except ``engine_kwargs``, which are used to make
+        the shared engine of each process
+    cache: ResultCache or None
+        Where to keep the result of each partition, see ``load_part``
     """
-    import dask
+    from dask.dataframe.utils import make_meta
+    if meta is not None:
+        meta = make_meta(meta)
+    parts = _manual_parts(uri, sql, where, where_tmp, meta, kwargs or {},
+                          cache)
+    return _from_parts(parts, meta)
+
+
+def _manual_parts(uri, sql, where, where_tmp, meta, kwargs, cache):
+    """Arguments of load_part for each of explicitly given partitions"""
+    where, params = _where_params(where, where_tmp)
+    return [dict(sql=sql, engine=uri, where=w, kwargs=kwargs, meta=meta,
+                 cache=cache, params=p) for w, p in zip(where, params)]
+
+
+def _from_parts(parts, meta=None, divisions=None, columns=None):
+    """Dask dataframe with one load_part task per partition"""
     import dask.dataframe as dd
-    if where_tmp is not None:
-        where = [where_tmp.format(*values) for values in where]
-    if kwargs is None:
-        kwargs = {}
-    dload = dask.delayed(load_part)
-    parts = [dload(sql, uri, w, kwargs) for w in where]
-    return dd.from_delayed(parts, meta=meta)
+    return dd.from_map(PartitionReader(columns), parts, meta=meta,
+                       divisions=divisions, label='read-sql',
+                       enforce_metadata=False)
+
+
+def iter_threaded(func, items, max_workers=4):
+    """
+    Apply func to each of items on a pool of threads, yielding in order
+
+    No more than max_workers results are being computed or waiting to be
+    yielded at any time, so that memory use is bounded. The database
+    drivers release the GIL while waiting on I/O.
+    """
+    import itertools
+    from collections import deque
+    from concurrent.futures import ThreadPoolExecutor
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers) as pool:
+        pending = deque(pool.submit(func, item)
+                        for item in itertools.islice(items, max_workers))
+        try:
+            while pending:
+                out = pending.popleft().result()
+                for item in itertools.islice(items, 1):
+                    pending.append(pool.submit(func, item))
+                yield out
+        finally:
+            for future in pending:
+                future.cancel()
 
 
 def make_ibis_client(uri):
@@ -333,7 +1527,15 @@ def make_ibis_client(uri):
     Returns
     -------
     A tuple of client, supports_schemas
+
+    The client is kept for reuse by later calls with the same uri, in this
+    process.
     """
+    from .engines import _registered
+    return _registered(('ibis', uri), lambda: _new_ibis_client(uri))
+
+
+def _new_ibis_client(uri):
     import sqlalchemy
     url = sqlalchemy.engine.url.make_url(uri)
     dialect = url.get_dialect()
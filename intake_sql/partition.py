@@ -0,0 +1,307 @@
+"""
+Planning of partition boundaries for SQLSourceAutoPartition
+
+dask's own planning splits the range between MIN and MAX of the index
+linearly, which gives very unequal partitions when the values are skewed.
+The functions here instead aim for an equal number of rows per partition.
+
+Filters given to the source are also compiled here into WHERE clauses, and
+used to skip partitions whose range of the index cannot pass them.
+
+For keys that cannot be divided linearly at all, such as text, UUIDs or
+several columns, ``keyset_bounds`` walks through the rows in key order.
+"""
+
+
+def stats_divisions(engine, table, index, npartitions, schema=None,
+                    method='stats'):
+    """
+    Partition boundaries with roughly equal numbers of rows between them
+
+    Parameters
+    ----------
+    engine: SQLAlchemy engine
+    table: str
+        Table name or SQL expression
+    index: str
+        Column to partition on
+    npartitions: int
+        Number of partitions wanted; fewer may result, if values of the
+        index repeat a lot
+    schema: str or None
+        Schema containing the table
+    method: 'stats' or 'quantile'
+        With 'stats', use the histogram the database keeps for its query
+        planner (currently PostgreSQL's ``pg_stats``), if there is one,
+        falling back to 'quantile', which computes exact boundaries with
+        a single ``NTILE`` window query (one scan of the index).
+
+    Returns
+    -------
+    List of npartitions + 1 or fewer strictly increasing values, suitable
+    as dask divisions; the first and last are the actual min and max.
+    """
+    with engine.connect() as con:
+        bounds = None
+        if method == 'stats' and engine.dialect.name == 'postgresql':
+            bounds = _pg_divisions(con, table, index, npartitions, schema)
+        if bounds is None:
+            bounds = _ntile_divisions(con, table, index, npartitions, schema)
+    return sorted(set(b for b in bounds if b is not None))
+
+
+def _ntile_divisions(con, table, index, npartitions, schema=None):
+    import sqlalchemy as sa
+    from .intake_sql import _selectable
+    col = sa.column(index)
+    tiles = sa.select(col, sa.func.ntile(npartitions).over(
+        order_by=col).label('_tile')).select_from(
+        _selectable(table, schema)).subquery()
+    rows = con.execute(
+        sa.select(sa.func.min(tiles.c[index]), sa.func.max(tiles.c[index]))
+        .group_by(tiles.c._tile).order_by(tiles.c._tile)).fetchall()
+    if not rows:
+        return []
+    return [r[0] for r in rows] + [rows[-1][1]]
+
+
+def _pg_divisions(con, table, index, npartitions, schema=None):
+    import sqlalchemy as sa
+    from .intake_sql import _selectable
+    row = con.execute(sa.text(
+        "SELECT s.histogram_bounds::text, format_type(a.atttypid, a.atttypmod)"
+        " FROM pg_stats s JOIN pg_attribute a ON a.attname = s.attname AND"
+        " a.attrelid = (quote_ident(s.schemaname) || '.' ||"
+        " quote_ident(s.tablename))::regclass"
+        " WHERE s.tablename = :table AND s.attname = :column"
+        " AND s.schemaname = COALESCE(:schema, current_schema())"),
+        {'table': table, 'column': index, 'schema': schema}).first()
+    if row is None or row[0] is None:
+        return None
+    hist = [r[0] for r in con.execute(
+        sa.text("SELECT unnest(CAST(:bounds AS %s[]))" % row[1]),
+        {'bounds': row[0]})]
+    # the histogram may be stale, so the ends come from the data
+    col = sa.column(index)
+    lo, hi = con.execute(sa.select(sa.func.min(col), sa.func.max(col))
+                         .select_from(_selectable(table, schema))).first()
+    if lo is None:
+        return []
+    step = (len(hist) - 1) / npartitions
+    inner = [hist[round(i * step)] for i in range(1, npartitions)]
+    return [lo] + [b for b in inner if lo < b < hi] + [hi]
+
+
+def _dnf(filters):
+    """Filters as a list of conjunctions (lists) of (column, op, value)"""
+    if not filters:
+        return []
+    if isinstance(filters[0], tuple):
+        return [list(filters)]
+    return [list(conj) for conj in filters]
+
+
+def filters_clause(filters):
+    """
+    SQLAlchemy WHERE clause from filters in disjunctive normal form
+
+    Parameters
+    ----------
+    filters: list of tuples, or list of lists of tuples
+        As for dask/pandas parquet readers: each tuple is
+        ``(column, op, value)``, with op one of ``=, ==, !=, <, <=, >, >=,
+        in, not in``; tuples in a list are combined with AND, and lists of
+        lists with OR.
+    """
+    import sqlalchemy as sa
+    ops = {'=': '__eq__', '==': '__eq__', '!=': '__ne__', '<': '__lt__',
+           '<=': '__le__', '>': '__gt__', '>=': '__ge__', 'in': 'in_',
+           'not in': 'not_in'}
+    conjunctions = []
+    for conj in _dnf(filters):
+        terms = []
+        for col, op, value in conj:
+            if op not in ops:
+                raise ValueError("Unknown filter operator: %s" % op)
+            terms.append(getattr(sa.column(col), ops[op])(value))
+        conjunctions.append(sa.and_(*terms))
+    return sa.or_(*conjunctions)
+
+
+def _may_match(conj, index, lower, upper, last):
+    """Whether index values in [lower, upper) (or ] if last) may pass conj"""
+    def inside(v):
+        return lower <= v and (v <= upper if last else v < upper)
+    for col, op, value in conj:
+        if col != index:
+            continue
+        try:
+            if op in ('=', '==') and not inside(value):
+                return False
+            if op == 'in' and not any(inside(v) for v in value):
+                return False
+            if op == '<' and not lower < value:
+                return False
+            if op == '<=' and not lower <= value:
+                return False
+            if op == '>' and not value < upper:
+                return False
+            if op == '>=' and not (value <= upper if last else value < upper):
+                return False
+        except TypeError:
+            # incomparable, so cannot rule out
+            pass
+    return True
+
+
+def prune_partitions(filters, index, divisions):
+    """
+    Which partitions may contain rows passing filters
+
+    Parameters
+    ----------
+    filters: see ``filters_clause``
+    index: str
+        Column by which partitions are bounded
+    divisions: list
+        Boundaries of the partitions, as dask divisions
+
+    Returns
+    -------
+    List of the indices of partitions to keep
+    """
+    dnf = _dnf(filters)
+    nparts = len(divisions) - 1
+    if not dnf:
+        return list(range(nparts))
+    return [i for i in range(nparts)
+            if any(_may_match(conj, index, divisions[i], divisions[i + 1],
+                              i == nparts - 1) for conj in dnf)]
+
+
+# dialects for which hash_bucket uses a hash function of the database
+HASH_DIALECTS = ('oracle', 'postgresql', 'mysql', 'mariadb', 'mssql')
+
+
+def hash_bucket(column, npartitions, dialect):
+    """
+    SQL expression giving the partition, 0 to npartitions - 1, of each row
+
+    The values of column are hashed with a function of the database, where
+    one is known; otherwise (e.g., SQLite) the column must be an integer and
+    is taken modulo npartitions. Rows where the column is NULL, which hash
+    to NULL, are put in partition 0, so that no row is lost.
+
+    Parameters
+    ----------
+    column: str
+        Column to hash
+    npartitions: int
+        Number of buckets
+    dialect: str
+        Name of the SQLAlchemy dialect, e.g., ``engine.dialect.name``
+    """
+    import sqlalchemy as sa
+    col = sa.column(column)
+    if dialect == 'oracle':
+        return sa.func.coalesce(sa.func.ora_hash(col, npartitions - 1), 0)
+    if dialect == 'postgresql':
+        hashed = sa.func.hashtext(sa.cast(col, sa.Text))
+    elif dialect in ('mysql', 'mariadb'):
+        hashed = sa.func.crc32(col)
+    elif dialect == 'mssql':
+        hashed = sa.func.checksum(col)
+    else:
+        hashed = col
+    # modulo before ABS, so that the most negative hash cannot overflow
+    return sa.func.coalesce(sa.func.abs(hashed % npartitions), 0)
+
+
+def key_compare(keys, values, op):
+    """
+    SQL comparison of the tuple of key columns with a tuple of values
+
+    Row value comparisons like ``(a, b) >= (1, 'x')`` are not supported by
+    every database, so the lexicographic comparison is written out, e.g.,
+    ``a > 1 OR (a = 1 AND b >= 'x')``.
+
+    Parameters
+    ----------
+    keys: list of str
+        Key columns, most significant first
+    values: tuple
+        Value of each key column
+    op: str
+        One of ``<, <=, >, >=``
+    """
+    import sqlalchemy as sa
+    strict = {'<': '__lt__', '<=': '__lt__', '>': '__gt__', '>=': '__gt__'}
+    if op not in strict:
+        raise ValueError("Unknown key comparison: %s" % op)
+    cols = [sa.column(k) for k in keys]
+    terms = []
+    for i, (col, value) in enumerate(zip(cols, values)):
+        equal = [c == v for c, v in zip(cols[:i], values[:i])]
+        terms.append(sa.and_(*equal, getattr(col, strict[op])(value)))
+    if op in ('<=', '>='):
+        terms.append(sa.and_(*[c == v for c, v in zip(cols, values)]))
+    return sa.or_(*terms)
+
+
+def keyset_bounds(engine, table, keys, npartitions, schema=None, where=None):
+    """
+    Lower bounds of partitions with equal numbers of rows, in key order
+
+    After counting the rows, each bound is found from the one before by a
+    seek ``WHERE key >= previous ORDER BY key LIMIT 1 OFFSET step``, which
+    an index on the key columns serves without sorting. Works for any
+    orderable key, including several columns, but each seek still skips
+    over ``step`` rows, so the whole costs about one scan of the index.
+
+    Parameters
+    ----------
+    engine: SQLAlchemy engine
+    table: str
+        Table name or SQL expression
+    keys: list of str
+        Key columns, most significant first
+    npartitions: int
+        Number of partitions wanted; fewer may result, for small tables or
+        keys with many repeated values
+    schema: str or None
+        Schema containing the table
+    where: SQLAlchemy clause or None
+        Condition on the rows to include, e.g., from ``filters_clause``
+
+    Returns
+    -------
+    List of tuples of key values, strictly increasing, the first being the
+    smallest key; partition i holds the keys from bound i up to (but not
+    including) bound i + 1, and the last those from the last bound on.
+    """
+    import sqlalchemy as sa
+    from .intake_sql import _selectable
+    cols = [sa.column(k) for k in keys]
+    rows = sa.select(*cols).select_from(_selectable(table, schema))
+    if where is not None:
+        rows = rows.where(where)
+    ordered = rows.order_by(*cols).limit(1)
+    with engine.connect() as con:
+        count = con.execute(sa.select(sa.func.count()).select_from(
+            rows.subquery())).scalar()
+        first = con.execute(ordered).first()
+        if not count or first is None:
+            return []
+        step = -(-count // npartitions)
+        bounds = [tuple(first)]
+        while len(bounds) < npartitions:
+            row = con.execute(ordered.where(
+                key_compare(keys, bounds[-1], '>=')).offset(step)).first()
+            if row is not None and tuple(row) == bounds[-1]:
+                # more than step rows share this key: start after them
+                row = con.execute(ordered.where(
+                    key_compare(keys, bounds[-1], '>'))).first()
+            if row is None:
+                break
+            bounds.append(tuple(row))
+    return bounds
@@ -1,4 +1,5 @@
 from . import __version__
+from .engines import get_engine
 from collections.abc import Mapping
 from intake.catalog.base import Catalog
 from intake.catalog.local import LocalCatalogEntry
@@ -10,75 +11,248 @@ class SQLCatalog(Catalog):
 
     This uses SQLAlchemy to infer the tables and views on the target server.
     Of these, those which have at least one primary key column will become
-    ``SQLSourceAutoPartition`` entries in this catalog.
+    ``SQLSourceAutoPartition`` entries in this catalog. A key of several
+    columns, or of text (including UUIDs), is partitioned by seeking
+    through the key order (``partition_method='keyset'``), and others by
+    dividing the range of the key.
+
+    Only the names of tables are fetched when the catalog is opened; the
+    columns and keys of each table are reflected when its entry is first
+    accessed. The metadata of each entry has ``estimated_rows`` and
+    ``estimated_bytes`` of its table, where the database keeps statistics
+    from which they can be had cheaply (see ``table_estimates``).
+
+    With ``partition_size`` (bytes, or a string such as ``'128MiB'``), each
+    ``SQLSourceAutoPartition`` entry gets ``npartitions`` to suit the
+    estimated size of its table, or else, if there is no estimate,
+    ``bytes_per_chunk`` for dask to work out the partitions from a count of
+    the rows; unless sql_kwargs already fixes the partitioning. The sizes
+    on disk and in memory differ, so the partitions are only roughly of
+    the size given.
+
+    With ``snapshot``, all tables are instead reflected at once, and the
+    result stored in a local directory, to be reused by later openings of
+    the catalog, in any process, for as long as the database's schema
+    version (see ``schema_version``) is unchanged; then, opening the
+    catalog costs only the one query for the version. For databases
+    without a known schema version, the snapshot is never reused.
+
+    With ``schemas``, a list of schema names and/or glob patterns (e.g.,
+    ``'sales_*'``) to match against those in the database, each schema
+    instead becomes an entry of this catalog: a nested SQLCatalog of its
+    tables. The nested catalogs are opened concurrently, ``max_workers``
+    (default 4) at a time, each with a connection from the shared pool;
+    set ``pool_size`` in ``engine_kwargs`` to at least max_workers.
     """
     name = 'sql_cat'
     version = __version__
 
-    def __init__(self, uri, views=False, sql_kwargs=None, **kwargs):
+    def __init__(self, uri, views=False, sql_kwargs=None, snapshot=None,
+                 schemas=None, max_workers=None, partition_size=None,
+                 **kwargs):
         self.sql_kwargs = sql_kwargs or {}
         self.uri = uri
         self.views = views
+        self.snapshot = snapshot
+        self.schemas = schemas
+        self.max_workers = max_workers
+        self.partition_size = partition_size
         super(SQLCatalog, self).__init__(**kwargs)
 
     def _load(self):
-        import sqlalchemy
-        engine = sqlalchemy.create_engine(self.uri)
-        meta = sqlalchemy.MetaData()
-        meta.reflect(bind=engine, views=self.views,
-                     schema=self.sql_kwargs.get("schema"))
-        self._entries = SQLEntries(meta, self.uri, self.sql_kwargs)
+        engine = get_engine(self.uri,
+                            **self.sql_kwargs.get("engine_kwargs") or {})
+        if self.schemas is None:
+            self._entries = SQLEntries(engine, self.uri, self.sql_kwargs,
+                                       self.views, self.snapshot,
+                                       self.partition_size)
+        else:
+            self._entries = self._schema_entries(engine)
+
+    def _schema_entries(self, engine):
+        """One nested catalog per schema, opened on a pool of threads"""
+        from .intake_sql import iter_threaded
+        entries = {}
+        for schema in match_schemas(engine, self.schemas):
+            args = {'uri': self.uri, 'views': self.views,
+                    'sql_kwargs': dict(self.sql_kwargs, schema=schema),
+                    'snapshot': self.snapshot,
+                    'partition_size': self.partition_size}
+            e = LocalCatalogEntry(schema, 'SQL schema %s from %s'
+                                  % (schema, self.uri), 'sql_cat', True,
+                                  args, {}, [], {}, "", getenv=False,
+                                  getshell=False)
+            e._plugin = [SQLCatalog]
+            entries[schema] = e
+
+        def open_schema(entry):
+            # the entry keeps the catalog, with its table names, for reuse
+            entry.get()._entries._get_tables()
+        for _ in iter_threaded(open_schema, list(entries.values()),
+                               self.max_workers or 4):
+            pass
+        return entries
 
 
 class SQLEntries(Mapping):
 
-    def __init__(self, meta, uri, sql_kwargs):
-        self.meta = meta
+    def __init__(self, engine, uri, sql_kwargs, views=False, snapshot=None,
+                 partition_size=None):
+        from .cache import SnapshotCache
+        self.engine = engine
         self.uri = uri
         self.sql_kwargs = sql_kwargs
+        self.views = views
+        self.snapshot = None if snapshot is None else SnapshotCache(snapshot)
+        if isinstance(partition_size, str):
+            from dask.utils import parse_bytes
+            partition_size = parse_bytes(partition_size)
+        self.partition_size = partition_size
         self.tables = None
+        self.info = {}
+        self.estimates = None
         self.cache = {}
 
+    def _key(self, name):
+        # as by MetaData.reflect, including the schema
+        schema = self.sql_kwargs.get("schema")
+        return schema + '.' + name if schema else name
+
     def _get_tables(self):
         if self.tables is None:
-            self.tables = list(self.meta.tables)
+            if self.snapshot is not None:
+                self._load_snapshot()
+                return
+            import sqlalchemy
+            from .instrument import measure
+            schema = self.sql_kwargs.get("schema")
+            with measure('reflect', track=True, schema=schema):
+                insp = sqlalchemy.inspect(self.engine)
+                names = insp.get_table_names(schema=schema)
+                if self.views:
+                    names += insp.get_view_names(schema=schema)
+            self.tables = {self._key(n): n for n in names}
+
+    def _load_snapshot(self):
+        """Tables and their info from the snapshot, or reflect and store"""
+        from .instrument import measure
+        schema = self.sql_kwargs.get("schema")
+        key = self.snapshot.key(self.uri, 'catalog',
+                                {'schema': schema, 'views': self.views})
+        with measure('reflect', track=True, schema=schema) as event:
+            token = schema_version(self.engine, schema)
+            data = self.snapshot.get(key, token)
+            if event is not None:
+                event['snapshot'] = data is not None
+            if data is None:
+                data = self._reflect_all()
+                if token is not None:
+                    self.snapshot.put(key, token, data)
+        self.tables, self.info = data['tables'], data['info']
+        self.estimates = data.get('estimates')
+
+    def _reflect_all(self):
+        """Names, columns and primary keys of all tables, in few queries"""
+        import sqlalchemy
+        from sqlalchemy.engine.reflection import ObjectKind
+        schema = self.sql_kwargs.get("schema")
+        kind = ObjectKind.TABLE
+        if self.views:
+            kind = kind | ObjectKind.VIEW
+        insp = sqlalchemy.inspect(self.engine)
+        columns = insp.get_multi_columns(schema=schema, kind=kind)
+        pks = insp.get_multi_pk_constraint(schema=schema, kind=kind)
+        tables, info = {}, {}
+        for (sch, name), cols in columns.items():
+            pk = (pks.get((sch, name)) or {}).get('constrained_columns') or []
+            tables[self._key(name)] = name
+            info[self._key(name)] = _table_info(
+                name, [(c['name'], c['type']) for c in cols], pk)
+        return {'tables': tables, 'info': info,
+                'estimates': table_estimates(self.engine, schema)}
+
+    def _metadata(self, name):
+        """Size estimates of the table with this name, for its entry"""
+        if self.estimates is None:
+            from .instrument import measure
+            schema = self.sql_kwargs.get("schema")
+            with measure('reflect', track=True, schema=schema):
+                self.estimates = table_estimates(self.engine, schema)
+        rows, size = self.estimates.get(name) or (None, None)
+        metadata = {}
+        if rows is not None:
+            metadata['estimated_rows'] = rows
+        if size is not None:
+            metadata['estimated_bytes'] = size
+        return metadata
+
+    def _partitioning(self, metadata):
+        """sql_kwargs for an auto-partitioned table of the given metadata"""
+        kwargs = self.sql_kwargs
+        if self.partition_size is None or any(
+                k in kwargs for k in ('npartitions', 'divisions',
+                                      'bytes_per_chunk')):
+            return kwargs
+        size = metadata.get('estimated_bytes')
+        if size is None:
+            return dict(kwargs, bytes_per_chunk=self.partition_size)
+        return dict(kwargs,
+                    npartitions=max(1, -(-size // self.partition_size)))
+
+    def _reflect(self, name):
+        """Columns and primary key of the one table"""
+        import sqlalchemy
+        from .instrument import measure
+        self._get_tables()
+        if name not in self.info:
+            with measure('reflect', track=True, table=name):
+                table = sqlalchemy.Table(
+                    self.tables[name], sqlalchemy.MetaData(),
+                    schema=self.sql_kwargs.get("schema"),
+                    autoload_with=self.engine, resolve_fks=False)
+            self.info[name] = _table_info(
+                table.name, [(c.name, c.type) for c in table.columns],
+                [c.name for c in table.primary_key.columns])
+        return self.info[name]
 
     def _make_entry(self, name):
         if name in self.cache:
             return
         from intake_sql import SQLSource, SQLSourceAutoPartition
         description = 'SQL table %s from %s' % (name, self.uri)
-        table = self.meta.tables[name]
-        for c in table.columns:
-            # We use table.name instead of the metadata key here as it
-            # does not include the schema name, which is handled
-            # by the `sql_kwargs`.
-            if c.primary_key:
-
-                description = 'SQL table %s from %s' % (name, self.uri)
-                args = {'uri': self.uri, 'table': table.name, 'index': c.name,
-                        'sql_kwargs': self.sql_kwargs}
-                e = LocalCatalogEntry(table.name, description, 'sql_auto', True,
-                                      args, {}, [], {}, "", getenv=False,
-                                      getshell=False)
-                e._plugin = [SQLSourceAutoPartition]
-                self.cache[name] = e
-                break
+        table = self._reflect(name)
+        metadata = self._metadata(table['name'])
+        # We use the table's name instead of the metadata key here as it
+        # does not include the schema name, which is handled by the
+        # `sql_kwargs`.
+        if table['primary_key']:
+            keys = table['primary_key']
+            args = {'uri': self.uri, 'table': table['name'],
+                    'index': keys[0],
+                    'sql_kwargs': self._partitioning(metadata)}
+            types = dict(table['columns'])
+            if len(keys) > 1 or _text_type(types[keys[0]]):
+                args.update(index=keys if len(keys) > 1 else keys[0],
+                            partition_method='keyset')
+            e = LocalCatalogEntry(table['name'], description, 'sql_auto', True,
+                                  args, {}, [], metadata, "", getenv=False,
+                                  getshell=False)
+            e._plugin = [SQLSourceAutoPartition]
         else:
             args = {
                 'uri': self.uri,
-                'sql_expr': table.name,
+                'sql_expr': table['name'],
                 'sql_kwargs': self.sql_kwargs
             }
             e = LocalCatalogEntry(name,description, 'sql', True,
-                                  args, {}, [], {}, "", getenv=False,
+                                  args, {}, [], metadata, "", getenv=False,
                                   getshell=False)
             e._plugin = [SQLSource]
-            self.cache[name] = e
+        self.cache[name] = e
 
     def keys(self):
         self._get_tables()
-        return self.tables
+        return list(self.tables)
 
     def __getitem__(self, item):
         self._make_entry(item)
@@ -90,3 +264,191 @@ class SQLEntries(Mapping):
     def __iter__(self):
         return iter(self.keys())
 
+
+
+def _table_info(name, columns, primary_key):
+    """Reflection of a table, as kept in a snapshot
+
+    The primary key columns are listed in the order of the key constraint,
+    which is that of its index, for keyset partitioning to seek along.
+    """
+    names = [c for c, _ in columns]
+    return {'name': name,
+            'columns': [[c, _type_name(t)] for c, t in columns],
+            'primary_key': [c for c in primary_key if c in names]}
+
+
+# parts of the names of column types which cannot be divided linearly
+_TEXT_TYPES = ('CHAR', 'TEXT', 'CLOB', 'UUID', 'UNIQUEIDENTIFIER', 'BINARY',
+               'BLOB', 'BYTEA')
+
+
+def _text_type(type_name):
+    """Whether the column type (by name, as in a snapshot) is text-like"""
+    base = type_name.split('(')[0].upper()
+    return any(t in base for t in _TEXT_TYPES)
+
+
+def _type_name(satype):
+    try:
+        return str(satype)
+    except Exception:
+        return type(satype).__name__
+
+
+def schema_version(engine, schema=None):
+    """
+    Token which changes whenever tables are created, dropped or altered
+
+    Found by a single cheap query: SQLite's ``schema_version`` pragma;
+    for PostgreSQL, the number of relations in the schema and the latest
+    transaction to modify one; for MySQL, the number of tables and latest
+    creation time, with a checksum of the names, types and keys of all
+    columns, which in-place ALTERs change without re-creating the table;
+    elsewhere, the number of tables and the latest DDL time in the system
+    catalog.
+
+    Returns None if there is no known way for this type of database.
+    """
+    import sqlalchemy as sa
+    name = engine.dialect.name
+    quote = engine.dialect.identifier_preparer.quote
+    params = {'schema': schema}
+    if name == 'sqlite':
+        query = 'PRAGMA %sschema_version' % (
+            quote(schema) + '.' if schema else '')
+        params = {}
+    elif name == 'postgresql':
+        query = ("SELECT count(*), max(c.xmin::text::bigint) FROM pg_class c"
+                 " JOIN pg_namespace n ON n.oid = c.relnamespace"
+                 " WHERE n.nspname = COALESCE(:schema, current_schema())")
+    elif name in ('mysql', 'mariadb'):
+        query = ("SELECT t.n, t.created, c.n, c.crc FROM"
+                 " (SELECT COUNT(*) AS n, MAX(CREATE_TIME) AS created"
+                 " FROM information_schema.tables"
+                 " WHERE TABLE_SCHEMA = COALESCE(:schema, DATABASE())) t,"
+                 " (SELECT COUNT(*) AS n, SUM(CRC32(CONCAT_WS(':',"
+                 " TABLE_NAME, COLUMN_NAME, ORDINAL_POSITION, COLUMN_TYPE,"
+                 " IS_NULLABLE, COLUMN_KEY))) AS crc"
+                 " FROM information_schema.columns"
+                 " WHERE TABLE_SCHEMA = COALESCE(:schema, DATABASE())) c")
+    elif name == 'mssql':
+        query = ("SELECT COUNT(*), MAX(modify_date) FROM sys.objects"
+                 " WHERE type IN ('U', 'V')"
+                 " AND schema_id = SCHEMA_ID(COALESCE(:schema, SCHEMA_NAME()))")
+    elif name == 'oracle':
+        # owners are stored in upper case, SQLAlchemy's names in lower
+        params = {'schema': engine.dialect.denormalize_name(schema)}
+        query = ("SELECT COUNT(*), MAX(LAST_DDL_TIME) FROM ALL_OBJECTS"
+                 " WHERE OWNER = COALESCE(:schema, USER)"
+                 " AND OBJECT_TYPE IN ('TABLE', 'VIEW')")
+    else:
+        return None
+    with engine.connect() as con:
+        return list(con.execute(sa.text(query), params).first())
+
+
+def match_schemas(engine, schemas):
+    """
+    Names of schemas, given as names and/or glob patterns
+
+    Only if there are patterns are the database's schemas listed, to match
+    against them.
+    """
+    import fnmatch
+    import sqlalchemy as sa
+    if isinstance(schemas, str):
+        schemas = [schemas]
+    if not any(set('*?[') & set(s) for s in schemas):
+        return list(schemas)
+    names = sa.inspect(engine).get_schema_names()
+    return [n for n in names
+            if any(fnmatch.fnmatchcase(n, s) for s in schemas)]
+
+
+def table_estimates(engine, schema=None):
+    """
+    Approximate numbers of rows and bytes of all tables in a schema
+
+    Taken from the statistics the database keeps, in one query for all
+    tables, without scanning any: PostgreSQL's ``pg_class``, MySQL's
+    ``information_schema.tables``, SQL Server's partition stats, Oracle's
+    ``ALL_TABLES``, and, for SQLite, ``sqlite_stat1`` (present after
+    ``ANALYZE``) and the ``dbstat`` table (if compiled in).
+
+    Returns
+    -------
+    dict of table name to (rows, bytes); either may be None if unknown,
+    and tables may be missing.
+    """
+    import logging
+    import sqlalchemy as sa
+    name = engine.dialect.name
+    params = {'schema': schema}
+    if name == 'sqlite':
+        return _sqlite_estimates(engine, schema)
+    if name == 'postgresql':
+        query = ("SELECT c.relname, CASE WHEN c.reltuples < 0 THEN NULL"
+                 " ELSE c.reltuples::bigint END, pg_total_relation_size(c.oid)"
+                 " FROM pg_class c JOIN pg_namespace n"
+                 " ON n.oid = c.relnamespace"
+                 " WHERE n.nspname = COALESCE(:schema, current_schema())"
+                 " AND c.relkind IN ('r', 'p', 'm')")
+    elif name in ('mysql', 'mariadb'):
+        query = ("SELECT TABLE_NAME, TABLE_ROWS, DATA_LENGTH + INDEX_LENGTH"
+                 " FROM information_schema.tables"
+                 " WHERE TABLE_SCHEMA = COALESCE(:schema, DATABASE())")
+    elif name == 'mssql':
+        query = ("SELECT o.name, SUM(s.row_count),"
+                 " SUM(s.reserved_page_count) * 8192"
+                 " FROM sys.dm_db_partition_stats s JOIN sys.objects o"
+                 " ON o.object_id = s.object_id"
+                 " WHERE o.type = 'U' AND s.index_id IN (0, 1)"
+                 " AND o.schema_id = SCHEMA_ID(COALESCE(:schema, SCHEMA_NAME()))"
+                 " GROUP BY o.name")
+    elif name == 'oracle':
+        params = {'schema': engine.dialect.denormalize_name(schema)}
+        query = ("SELECT TABLE_NAME, NUM_ROWS, NUM_ROWS * AVG_ROW_LEN"
+                 " FROM ALL_TABLES WHERE OWNER = COALESCE(:schema, USER)")
+    else:
+        return {}
+    try:
+        with engine.connect() as con:
+            rows = con.execute(sa.text(query), params).fetchall()
+    except sa.exc.DBAPIError:
+        # e.g., no permission to read the statistics
+        logging.getLogger('intake_sql').debug(
+            "No table estimates for schema %s", schema, exc_info=True)
+        return {}
+    if name == 'oracle':
+        # as the names of tables reflected by SQLAlchemy
+        rows = [(engine.dialect.normalize_name(r[0]), ) + tuple(r[1:])
+                for r in rows]
+    return {r[0]: (_int(r[1]), _int(r[2])) for r in rows}
+
+
+def _sqlite_estimates(engine, schema=None):
+    import sqlalchemy as sa
+    prefix = engine.dialect.identifier_preparer.quote(schema) + '.' \
+        if schema else ''
+    rows, sizes = {}, {}
+    with engine.connect() as con:
+        try:
+            # the first number of each stat is the count of rows
+            for tbl, stat in con.execute(sa.text(
+                    "SELECT tbl, stat FROM %ssqlite_stat1" % prefix)):
+                rows[tbl] = int(stat.split()[0])
+        except sa.exc.DBAPIError:
+            pass
+        try:
+            sizes = dict(con.execute(sa.text(
+                "SELECT name, SUM(pgsize) FROM %sdbstat GROUP BY name"
+                % prefix)).fetchall())
+        except sa.exc.DBAPIError:
+            pass
+    return {t: (rows.get(t), _int(sizes.get(t)))
+            for t in set(rows) | set(sizes)}
+
+
+def _int(value):
+    return None if value is None else int(value)
@@ -1,3 +1,5 @@
+import os
+
 import intake
 import pandas as pd
 import pytest
@@ -65,3 +67,603 @@ def test_to_ibis(temp_db):
     expr = s.to_ibis()
     d2 = expr.execute().set_index('p')
     assert df.equals(d2)
+
+
+def test_discover_probe(temp_db):
+    table, table_nopk, uri = temp_db
+    s = SQLSource(uri, table, sql_kwargs=dict(index_col='p'))
+    info = s.discover()
+    assert s._dataframe is None
+    assert info['dtype'] == {k: str(v) for k, v in df.dtypes.items()}
+    assert info['shape'] == (None, 3)
+    s = SQLSource(uri, "SELECT a, b FROM " + table + " WHERE p < 10",
+                  count_rows=True)
+    assert s.discover()['shape'] == (10, 2)
+    assert s._dataframe is None
+    assert len(s.read()) == 10
+    assert s.discover()['shape'] == (10, 2)
+
+
+def test_read_chunked(temp_db):
+    table, table_nopk, uri = temp_db
+    s = SQLSource(uri, table, sql_kwargs=dict(index_col='p'))
+    parts = list(s.read_chunked(chunksize=30))
+    assert [len(p) for p in parts] == [30, 30, 30, 10]
+    assert df.equals(pd.concat(parts))
+    assert s._dataframe is None
+    assert len(list(s)) == 1
+    s = SQLSource(uri, table, sql_kwargs=dict(index_col='p', chunksize=40))
+    assert [len(p) for p in s] == [40, 40, 20]
+    assert df.equals(s.read())
+
+
+def test_to_arrow(temp_db):
+    pytest.importorskip("pyarrow")
+    table, table_nopk, uri = temp_db
+    s = SQLSource(uri, table)
+    assert df.equals(s.to_arrow().to_pandas().set_index('p'))
+    s = SQLSourceAutoPartition(uri, table, index='p',
+                               sql_kwargs=dict(npartitions=3))
+    assert df.equals(s.to_arrow().to_pandas().set_index('p'))
+    s = SQLSourceManualPartition(uri, "SELECT * FROM " + table,
+               where_values=[(0, 20), (20, 100)],
+               where_template="WHERE p >= {} AND p < {}")
+    assert df.equals(s.to_arrow().to_pandas().set_index('p'))
+    s = SQLSource(uri, "SELECT * FROM " + table + " WHERE p < 0")
+    assert s.to_arrow().num_rows == 0
+    # batches whose inferred types differ
+    s = SQLSource(uri, "SELECT p, CASE WHEN p < 50 THEN p ELSE p * 1.5 END"
+                  " AS x FROM " + table, sql_kwargs={'fetch_size': 10})
+    out = s.to_arrow()
+    assert str(out.schema.field('x').type) == 'double'
+    assert out.column('x').to_pylist() == s.read().x.tolist()
+
+
+def test_shared_engine(temp_db):
+    from intake_sql.engines import get_engine, dispose_engines
+    table, table_nopk, uri = temp_db
+    engine = get_engine(uri)
+    assert get_engine(uri) is engine
+    assert get_engine(uri, pool_size=2) is not engine
+    s = SQLSourceManualPartition(uri, "SELECT * FROM " + table,
+               where_values=['WHERE p < %i' % i for i in range(1, 11)],
+               sql_kwargs=dict(index_col='p'))
+    assert len(s.read()) == 55
+    s = SQLSourceAutoPartition(uri, table, index='p',
+                               sql_kwargs=dict(npartitions=5))
+    assert df.equals(s.read())
+    assert get_engine(uri) is engine
+    # every partition went through the one pool
+    assert engine.pool.checkedout() == 0
+    dispose_engines()
+    assert get_engine(uri) is not engine
+
+
+def test_result_cache(temp_db, tmpdir, monkeypatch):
+    pytest.importorskip("pyarrow")
+    table, table_nopk, uri = temp_db
+    path = str(tmpdir)
+    s = SQLSource(uri, table, sql_kwargs=dict(index_col='p'),
+                  result_cache=path)
+    assert df.equals(s.read())
+    s = SQLSourceManualPartition(uri, "SELECT * FROM " + table,
+               where_values=['WHERE p < 20', 'WHERE p >= 20'],
+               sql_kwargs=dict(index_col='p'), result_cache={'path': path})
+    assert df.equals(s.read())
+    # whole result, two partitions and the rows probed for the meta
+    assert len(os.listdir(path)) == 4
+
+    def fail(*args, **kwargs):
+        raise AssertionError("database accessed")
+    with monkeypatch.context() as m:
+        m.setattr(pd, "read_sql", fail)
+        s = SQLSource(uri, table, sql_kwargs=dict(index_col='p'),
+                      result_cache=path)
+        assert df.equals(s.read())
+        s = SQLSourceManualPartition(uri, "SELECT * FROM " + table,
+                   where_values=['WHERE p < 20', 'WHERE p >= 20'],
+                   sql_kwargs=dict(index_col='p'), result_cache=path)
+        assert df.equals(s.read())
+
+    s = SQLSourceAutoPartition(uri, table, index='p',
+                               sql_kwargs=dict(npartitions=2),
+                               result_cache=path)
+    assert df.equals(s.read())
+    assert len(os.listdir(path)) == 6
+    assert df.equals(s.read())
+
+    # expired results are re-read, and the directory is kept within bounds
+    s = SQLSource(uri, table, sql_kwargs=dict(index_col='p'),
+                  result_cache={'path': path, 'ttl': 0, 'max_bytes': 1})
+    assert df.equals(s.read())
+    assert len(os.listdir(path)) == 0
+
+
+def test_stats_divisions(tmpdir):
+    uri = 'sqlite:///' + str(tmpdir.join('skew.db'))
+    skew = pd.DataFrame({'v': range(100)},
+                        index=pd.Index([i ** 2 for i in range(100)], name='p'))
+    skew.to_sql('skew', uri)
+    s = SQLSourceAutoPartition(uri, 'skew', index='p',
+                               sql_kwargs=dict(npartitions=4))
+    assert [len(p) for p in s.read_chunked()][0] == 50
+    for method in ['stats', 'quantile']:
+        s = SQLSourceAutoPartition(uri, 'skew', index='p',
+                                   sql_kwargs=dict(npartitions=4),
+                                   divisions_method=method)
+        assert [len(p) for p in s.read_chunked()] == [25, 25, 25, 25]
+        assert s.to_dask().divisions == (0, 625, 2500, 5625, 9801)
+        assert skew.equals(s.read())
+
+
+def test_manual_bind_params(temp_db):
+    table, table_nopk, uri = temp_db
+    s = SQLSourceManualPartition(uri, "SELECT * FROM " + table,
+               where_values=[(0, 20), {'lo': 20, 'hi': 100}],
+               where_template="WHERE p >= :lo AND p < :hi",
+               sql_kwargs=dict(index_col='p'))
+    assert s.discover()['npartitions'] == 2
+    assert df.equals(s.read())
+    assert len(s.read_partition(0)) == 20
+    s = SQLSourceManualPartition(uri, "SELECT * FROM " + table +
+                                 " WHERE c = :c",
+               where_values=[(0, 50), (50, 100)],
+               where_template="AND p >= :lo AND p < :hi",
+               sql_kwargs=dict(index_col='p', params={'c': 'a'}))
+    assert df[df.c == 'a'].equals(s.read())
+
+
+def test_manual_meta_probe(temp_db):
+    table, table_nopk, uri = temp_db
+    s = SQLSourceManualPartition(uri, "SELECT * FROM " + table,
+               where_values=['WHERE p < 0', 'WHERE p >= 0'],
+               sql_kwargs=dict(index_col='p'))
+    assert s.discover()['dtype'] == {k: str(v) for k, v in df.dtypes.items()}
+    assert s.read_partition(0).empty
+    assert df.equals(s.read())
+
+
+def test_threaded_partitions(temp_db):
+    table, table_nopk, uri = temp_db
+    s = SQLSourceManualPartition(uri, "SELECT * FROM " + table,
+               where_values=[(i, i + 10) for i in range(0, 100, 10)],
+               where_template="WHERE p >= :lo AND p < :hi",
+               sql_kwargs=dict(index_col='p'), max_workers=3)
+    parts = list(s.iter_partitions())
+    assert [p.index[0] for p in parts] == list(range(0, 100, 10))
+    assert df.equals(s.read())
+    # no dask graph was needed
+    assert s._dataframe is None
+    s = SQLSourceAutoPartition(uri, table, index='p',
+                               sql_kwargs=dict(npartitions=4))
+    assert sum(len(p) for p in s.iter_partitions(max_workers=2)) == 100
+    s = SQLSourceAutoPartition(uri, table, index='p', max_workers=2,
+                               sql_kwargs=dict(npartitions=4))
+    assert df.equals(s.read())
+
+
+def test_watermark(tmpdir):
+    pytest.importorskip("pyarrow")
+    uri = 'sqlite:///' + str(tmpdir.join('events.db'))
+    events = pd.DataFrame({'v': [1., 2., 3.]},
+                          index=pd.Index([1, 2, 3], name='id'))
+    events.to_sql('events', uri)
+    path = str(tmpdir.join('cache'))
+    s = SQLSource(uri, 'events', sql_kwargs=dict(index_col='id'),
+                  watermark='id', result_cache=path)
+    assert events.equals(s.read())
+    more = pd.DataFrame({'v': [4., 5.]}, index=pd.Index([4, 5], name='id'))
+    more.to_sql('events', uri, if_exists='append')
+    first = s._dataframe
+    assert pd.concat([events, more]).equals(s.read())
+    assert s._dataframe is not first
+
+    # a new session starts from the cached rows
+    s = SQLSource(uri, 'SELECT id, v FROM events', watermark='id',
+                  result_cache=path)
+    assert len(s.read()) == 5
+    pd.DataFrame({'v': [6.]}, index=pd.Index([6], name='id')).to_sql(
+        'events', uri, if_exists='append')
+    s = SQLSource(uri, 'events', sql_kwargs=dict(index_col='id'),
+                  watermark='id', result_cache=path)
+    out = s.read()
+    assert list(out.index) == [1, 2, 3, 4, 5, 6]
+    assert s.read() is out
+
+
+def test_column_projection(temp_db, monkeypatch):
+    table, table_nopk, uri = temp_db
+    queries = []
+    read_sql = pd.read_sql
+
+    def record(sql, *args, **kwargs):
+        queries.append(str(sql))
+        return read_sql(sql, *args, **kwargs)
+    monkeypatch.setattr(pd, "read_sql", record)
+
+    s = SQLSource(uri, "SELECT * FROM " + table, columns=['a'],
+                  sql_kwargs=dict(index_col='p'))
+    assert df[['a']].equals(s.read())
+    assert 'SELECT p, a' in queries[-1]
+
+    s = SQLSourceAutoPartition(uri, table, index='p', columns=['b'],
+                               sql_kwargs=dict(npartitions=2))
+    assert df[['b']].equals(s.read())
+
+    s = SQLSourceManualPartition(uri, "SELECT * FROM " + table,
+               where_values=['WHERE p < 20', 'WHERE p >= 20'],
+               sql_kwargs=dict(index_col='p'), columns=['c'])
+    assert s.discover()['dtype'] == {'c': 'object'}
+    assert df[['c']].equals(s.read())
+
+    # projection by dask reaches the SQL of each partition
+    s = SQLSourceAutoPartition(uri, table, index='p',
+                               sql_kwargs=dict(npartitions=2))
+    ddf = s.to_dask()
+    del queries[:]
+    assert df['a'].equals(ddf['a'].compute())
+    assert len(queries) == 2
+    assert all(q.startswith('SELECT temp.p, temp.a') for q in queries)
+
+
+def test_filters(temp_db):
+    table, table_nopk, uri = temp_db
+    s = SQLSourceAutoPartition(uri, table, index='p',
+                               sql_kwargs=dict(npartitions=4),
+                               filters=[('p', '>=', 60), ('c', '!=', 'a')])
+    # partitions entirely below p=60 are not read at all
+    assert s.discover()['npartitions'] == 2
+    expected = df[(df.index >= 60) & (df.c != 'a')]
+    assert expected.equals(s.read())
+    assert s.to_dask().divisions[0] == 49
+
+    # OR of conjunctions; nothing can match gives one empty partition
+    s = SQLSourceAutoPartition(uri, table, index='p',
+                               sql_kwargs=dict(npartitions=4),
+                               filters=[[('p', '<', 5)], [('p', 'in', [98])]])
+    assert s.discover()['npartitions'] == 2
+    assert df.loc[[0, 1, 2, 3, 4, 98]].equals(s.read())
+    s = SQLSourceAutoPartition(uri, table, index='p',
+                               sql_kwargs=dict(npartitions=4),
+                               filters=[('p', '>', 1000)])
+    assert s.discover()['npartitions'] == 1
+    assert len(s.read()) == 0
+
+
+def test_auto_expression(temp_db):
+    table, table_nopk, uri = temp_db
+    sql = ("SELECT t.p, t.a, t.b * 2 AS b2 FROM %s t"
+           " JOIN (SELECT DISTINCT b FROM %s) u ON t.b = u.b" % (table, table))
+    expected = df[['a']].assign(b2=df.b * 2)
+    s = SQLSourceAutoPartition(uri, sql, index='p',
+                               sql_kwargs=dict(npartitions=3))
+    assert s.discover()['npartitions'] == 3
+    assert s.to_dask().known_divisions
+    assert expected.equals(s.read())
+
+    s = SQLSourceAutoPartition(uri, sql, index='p', partition_method='hash',
+                               sql_kwargs=dict(npartitions=3))
+    ddf = s.to_dask()
+    assert ddf.npartitions == 3
+    assert not ddf.known_divisions
+    assert (s.read_partition(1).index % 3 == 1).all()
+    assert expected.equals(s.read().sort_index())
+
+    with pytest.raises(ValueError):
+        SQLSourceAutoPartition(uri, sql, index='p', partition_method='hash')
+
+
+def test_dtype_policy(temp_db):
+    pytest.importorskip("pyarrow")
+    table, table_nopk, uri = temp_db
+    s = SQLSource(uri, table, sql_kwargs=dict(index_col='p'),
+                  dtype_policy='compact')
+    assert s.discover()['dtype']['c'] == 'string'
+    out = s.read()
+    assert out.c.dtype == 'string[pyarrow]'
+    assert out.b.dtype == 'int64'
+    assert df.astype({'c': 'string[pyarrow]'}).equals(out)
+
+    s = SQLSource(uri, "SELECT * FROM %s WHERE c = :c" % table,
+                  sql_kwargs=dict(index_col='p', params={'c': 'a'}),
+                  dtype_policy='compact')
+    assert s.read().c.dtype == 'string[pyarrow]'
+
+    s = SQLSourceAutoPartition(uri, table, index='p',
+                               sql_kwargs=dict(npartitions=2),
+                               dtype_policy={'c': 'category', 'b': 'int16'})
+    ddf = s.to_dask()
+    assert ddf.b.dtype == 'int16'
+    out = s.read()
+    assert out.b.dtype == 'int16'
+    assert out.c.dtype == 'category'
+    assert (out.b == df.b).all()
+
+    s = SQLSourceManualPartition(uri, "SELECT * FROM " + table,
+               where_values=['WHERE p < 20', 'WHERE p >= 20'],
+               sql_kwargs=dict(index_col='p'), dtype_policy='compact')
+    assert s.discover()['dtype']['c'] == 'string'
+    assert s.read().c.dtype == 'string[pyarrow]'
+
+
+def test_dtype_policy_types(tmpdir):
+    from sqlalchemy.dialects import mysql
+    from intake_sql.dtypes import sql_dtype
+    assert sql_dtype(mysql.INTEGER(unsigned=True), False, 'mysql') == 'int64'
+    assert sql_dtype(mysql.SMALLINT(unsigned=True), True, 'mysql') == 'Int32'
+    assert sql_dtype(mysql.BIGINT(unsigned=True), False, 'mysql') == 'uint64'
+    assert sql_dtype(mysql.INTEGER(), False, 'mysql') == 'int32'
+    assert sql_dtype(mysql.INTEGER(), False, 'oracle') is None
+
+    uri = 'sqlite:///' + str(tmpdir.join('dated.db'))
+    data = pd.DataFrame({'t': pd.date_range('2020-01-01', periods=3),
+                         'v': [1, 2, 3]})
+    data.to_sql('dated', uri, index=False)
+    out = SQLSource(uri, 'dated', dtype_policy='compact').read()
+    assert out.t.dtype == 'datetime64[ns]'
+    assert data.astype({'v': 'Int64'}).equals(out)
+
+
+def test_plan_cache(tmpdir, monkeypatch):
+    import dask.dataframe as dd
+    uri = 'sqlite:///' + str(tmpdir.join('plan.db'))
+    data = pd.DataFrame({'v': [float(i) for i in range(10)]},
+                        index=pd.Index(range(10), name='id'))
+    data.to_sql('data', uri)
+    path = str(tmpdir.join('plans'))
+    kw = dict(sql_kwargs=dict(npartitions=2), plan_cache=path)
+    s = SQLSourceAutoPartition(uri, 'data', index='id', **kw)
+    assert data.equals(s.read())
+    divisions = s.to_dask().divisions
+
+    # a new instance plans nothing while the table is unchanged
+    def fail(*args, **kwargs):
+        raise AssertionError("planned again")
+    monkeypatch.setattr(dd, "read_sql_table", fail)
+    s = SQLSourceAutoPartition(uri, 'data', index='id', **kw)
+    assert s.to_dask().divisions == divisions
+    assert data.equals(s.read())
+    monkeypatch.undo()
+
+    # appending beyond the maximum index invalidates the plan
+    more = pd.DataFrame({'v': [10.]}, index=pd.Index([10], name='id'))
+    more.to_sql('data', uri, if_exists='append')
+    s = SQLSourceAutoPartition(uri, 'data', index='id', **kw)
+    assert s.to_dask().divisions[-1] == 10
+    assert len(s.read()) == 11
+
+
+def test_read_async(temp_db):
+    pytest.importorskip("aiosqlite")
+    import asyncio
+    table, table_nopk, uri = temp_db
+    s = SQLSource(uri, table, sql_kwargs=dict(index_col='p'))
+    m = SQLSourceManualPartition(uri, "SELECT * FROM " + table,
+            where_values=[(0, 30), (30, 60), (60, 100)],
+            where_template="WHERE p >= :lo AND p < :hi",
+            sql_kwargs=dict(index_col='p'), columns=['a', 'c'])
+
+    async def main():
+        part = await m.read_partition_async(1)
+        whole, parts = await asyncio.gather(s.read_async(),
+                                            m.read_async(max_concurrency=2))
+        return part, whole, parts
+    part, whole, parts = asyncio.run(main())
+    assert df.equals(whole)
+    assert df[['a', 'c']].equals(parts)
+    assert df[['a', 'c']].iloc[30:60].equals(part)
+    assert m.discover()['npartitions'] == 3
+
+
+def test_fetch_size(temp_db, monkeypatch):
+    table, table_nopk, uri = temp_db
+    chunks = []
+    read_sql = pd.read_sql
+
+    def record(sql, con, *args, **kwargs):
+        chunks.append(kwargs.get('chunksize'))
+        return read_sql(sql, con, *args, **kwargs)
+    monkeypatch.setattr(pd, "read_sql", record)
+
+    s = SQLSource(uri, table, sql_kwargs=dict(index_col='p', fetch_size=7),
+                  probe_rows=None)
+    assert df.equals(s.read())
+    assert chunks == [7]
+    s = SQLSourceAutoPartition(uri, table, index='p',
+                               sql_kwargs=dict(npartitions=2, fetch_size=7))
+    assert df.equals(s.read())
+    s = SQLSourceManualPartition(uri, "SELECT * FROM " + table,
+               where_values=['WHERE p < 20', 'WHERE p >= 20'],
+               sql_kwargs=dict(index_col='p', stream_results=True))
+    assert df.equals(s.read())
+    assert chunks[-2:] == [10000, 10000]
+
+
+def test_instrumentation(temp_db):
+    from intake_sql import instrument
+    table, table_nopk, uri = temp_db
+    events = []
+    instrument.add_callback(events.append)
+    try:
+        s = SQLSourceManualPartition(uri, "SELECT * FROM " + table,
+                   where_values=[(0, 30), (30, 100)],
+                   where_template="WHERE p >= :lo AND p < :hi",
+                   sql_kwargs=dict(index_col='p'))
+        s.read_partition(1)
+        s = SQLSourceAutoPartition(uri, table, index='p',
+                                   sql_kwargs=dict(npartitions=2))
+        s.discover()
+    finally:
+        instrument.remove_callback(events.append)
+    probe, part, plan = events
+    assert probe['kind'] == 'probe' and probe['rows'] == 100
+    assert part['kind'] == 'partition'
+    assert part['params'] == {'lo': 30, 'hi': 100}
+    assert part['rows'] == 70 and part['bytes'] > 0
+    assert part['execute'] > 0
+    assert part['total'] >= part['connect'] + part['execute']
+    assert plan['kind'] == 'plan' and plan['execute'] > 0
+
+
+def test_keyset(tmpdir, monkeypatch):
+    import uuid
+    uri = 'sqlite:///' + str(tmpdir.join('keys.db'))
+    keys = sorted(str(uuid.UUID(int=i * 7919)) for i in range(100))
+    data = pd.DataFrame({'g': [i // 10 for i in range(100)],
+                         'h': [i % 10 for i in range(100)],
+                         'v': range(100)}, index=pd.Index(keys, name='u'))
+    data.to_sql('keys', uri)
+
+    s = SQLSourceAutoPartition(uri, 'keys', index='u',
+                               partition_method='keyset',
+                               sql_kwargs=dict(npartitions=4))
+    assert [len(p) for p in s.read_chunked()] == [25, 25, 25, 25]
+    assert s.to_dask().divisions == (keys[0], keys[25], keys[50], keys[75],
+                                     keys[99])
+    assert data.equals(s.read())
+
+    s = SQLSourceAutoPartition(uri, 'keys', index=['g', 'h'],
+                               partition_method='keyset',
+                               sql_kwargs=dict(npartitions=3),
+                               filters=[('v', '>=', 10)])
+    assert [len(p) for p in s.read_chunked()] == [30, 30, 30]
+    assert not s.to_dask().known_divisions
+    part = s.read_partition(1)
+    assert part.index.name == 'g'
+    assert part.v.tolist() == list(range(40, 70))
+
+    with pytest.raises(ValueError):
+        SQLSourceAutoPartition(uri, 'keys', index=['g', 'h'])
+
+    # bounds are reused from the plan cache while the table is unchanged
+    from intake_sql import partition
+    args = dict(index=['g', 'h'], partition_method='keyset',
+                sql_kwargs=dict(npartitions=4),
+                plan_cache=str(tmpdir.join('plans')))
+    first = SQLSourceAutoPartition(uri, 'keys', **args).read()
+    monkeypatch.setattr(partition, 'keyset_bounds', None)
+    s = SQLSourceAutoPartition(uri, 'keys', **args)
+    assert s.discover()['npartitions'] == 4
+    assert first.equals(s.read())
+
+
+def test_read_without_probe(tmpdir):
+    from intake_sql import instrument
+    uri = 'sqlite:///' + str(tmpdir.join('dates.db'))
+    data = pd.DataFrame({'t': pd.date_range('2020-01-01', periods=5),
+                         'v': range(5)})
+    data.to_sql('dates', uri, index=False)
+    s = SQLSource(uri, 'dates')
+    assert s.discover()['dtype'] == {'t': 'datetime64[ns]', 'v': 'int64'}
+    assert data.equals(s.read())
+
+    events = []
+    instrument.add_callback(events.append)
+    try:
+        s = SQLSource(uri, 'SELECT v FROM dates ORDER BY v DESC;',
+                      count_rows=True)
+        assert s.read().v.tolist() == [4, 3, 2, 1, 0]
+        assert s.discover()['shape'] == (5, 1)
+    finally:
+        instrument.remove_callback(events.append)
+    assert [e['kind'] for e in events] == ['load']
+
+
+def test_auto_datetime_index(tmpdir):
+    uri = 'sqlite:///' + str(tmpdir.join('times.db'))
+    data = pd.DataFrame({'v': range(48)}, index=pd.Index(
+        pd.date_range('2020-01-01', periods=48, freq='h'), name='t'))
+    data.to_sql('times', uri)
+    s = SQLSourceAutoPartition(uri, 'times', index='t',
+                               sql_kwargs=dict(npartitions=4))
+    assert s.to_dask().npartitions == 4
+    assert data.equals(s.read())
+    assert s.to_arrow().num_rows == 48
+
+
+def test_manual_probe_late_nulls(tmpdir):
+    uri = 'sqlite:///' + str(tmpdir.join('nulls.db'))
+    data = pd.DataFrame({'k': range(10),
+                         'v': [1, 2, 3, 4, 5, None, 7, None, 9, 10]})
+    data.astype({'v': 'Int64'}).to_sql('nulls', uri, index=False)
+    s = SQLSourceManualPartition(
+        uri, "SELECT k, v FROM nulls",
+        where_values=['WHERE k < 5', 'WHERE k >= 5'], probe_rows=3)
+    assert s.discover()['dtype']['v'] == 'int64'
+    out = s.read()
+    assert out.v.dtype == 'float64'
+    assert out.v.isna().sum() == 2
+
+
+def test_watermark_dates(tmpdir):
+    pytest.importorskip("pyarrow")
+    uri = 'sqlite:///' + str(tmpdir.join('stamps.db'))
+    times = pd.date_range('2020-01-01', periods=6, freq='h')
+    pd.DataFrame({'t': times[:2], 'v': [1, 2]}).to_sql('stamps', uri,
+                                                       index=False)
+    s = SQLSource(uri, 'stamps', watermark='t',
+                  result_cache=str(tmpdir.join('cache')))
+    assert len(s.read()) == 2
+    for i in [2, 4]:
+        pd.DataFrame({'t': times[i:i + 2], 'v': [i + 1, i + 2]}).to_sql(
+            'stamps', uri, if_exists='append', index=False)
+        out = s.read()
+    assert out.t.dtype == 'datetime64[ns]'
+    assert out.t.tolist() == list(times)
+    assert out.v.tolist() == [1, 2, 3, 4, 5, 6]
+
+
+def test_hash_null_keys(temp_db):
+    table, table_nopk, uri = temp_db
+    sql = ("SELECT CASE WHEN p %% 3 = 0 THEN p END AS q, a FROM %s"
+           % table)
+    s = SQLSourceAutoPartition(uri, sql, index='q', partition_method='hash',
+                               sql_kwargs=dict(npartitions=3))
+    out = s.read()
+    assert len(out) == 100
+    assert out.index.isna().sum() == 66
+    assert s.read_partition(0).index.isna().sum() == 66
+
+
+def test_probe_types_params(tmpdir):
+    uri = 'sqlite:///' + str(tmpdir.join('flags.db'))
+    data = pd.DataFrame({'p': range(20), 'f': [True, False] * 10})
+    data.to_sql('flags', uri, index=False)
+    s = SQLSource(uri, 'flags')
+    assert s.discover()['dtype'] == {'p': 'int64', 'f': 'bool'}
+    assert data.equals(s.read())
+
+    s = SQLSource(uri, "SELECT * FROM flags WHERE p < ?",
+                  sql_kwargs={'params': (10, )})
+    assert s.discover()['shape'] == (10, 2)
+    assert len(s.read()) == 10
+
+
+def test_manual_positional_params(temp_db):
+    table, table_nopk, uri = temp_db
+    s = SQLSourceManualPartition(
+        uri, "SELECT * FROM %s WHERE c = ?" % table,
+        ['AND p < 50', 'AND p >= 50'],
+        sql_kwargs={'params': ('a', ), 'index_col': 'p'})
+    assert s.discover()['npartitions'] == 2
+    assert df[df.c == 'a'].equals(s.read())
+
+
+def test_hash_checks(temp_db):
+    table, table_nopk, uri = temp_db
+    sql = "SELECT * FROM %s WHERE c = :c" % table
+    with pytest.raises(ValueError):
+        SQLSourceAutoPartition(uri, sql, index='p',
+                               sql_kwargs=dict(npartitions=2,
+                                               params={'c': 'a'}))
+    s = SQLSourceAutoPartition(uri, sql, index='p', partition_method='hash',
+                               sql_kwargs=dict(npartitions=2,
+                                               params={'c': 'a'}))
+    assert df[df.c == 'a'].equals(s.read().sort_index())
+
+    for expr in [table, "SELECT c, a FROM " + table]:
+        s = SQLSourceAutoPartition(uri, expr, index='c',
+                                   partition_method='hash',
+                                   sql_kwargs=dict(npartitions=3))
+        with pytest.raises(ValueError):
+            s.discover()
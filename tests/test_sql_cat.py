@@ -7,6 +7,7 @@ import time
 import intake
 import pytest
 
+from intake_sql import SQLSource, SQLSourceAutoPartition
 from intake_sql.sql_cat import SQLCatalog
 from .utils import temp_db, df, df2
 
@@ -73,3 +74,176 @@ def test_with_server(remote_sql):
     s = cat.tables.temp()
     data = s.read()
     assert data.equals(df)
+
+
+def test_lazy_reflection(temp_db):
+    table, table_nopk, uri = temp_db
+    cat = SQLCatalog(uri)
+    assert set(cat) >= {table, table_nopk}
+    assert cat._entries.cache == {}
+    assert cat[table].describe()['container'] == 'dataframe'
+    assert list(cat._entries.cache) == [table]
+
+
+def test_snapshot(tmpdir, monkeypatch):
+    import pandas as pd
+    import sqlalchemy as sa
+    uri = 'sqlite:///' + str(tmpdir.join('snap.db'))
+    engine = sa.create_engine(uri)
+    with engine.begin() as con:
+        con.execute(sa.text("CREATE TABLE one (k INTEGER PRIMARY KEY, v TEXT)"))
+    path = str(tmpdir.join('snapshots'))
+    cat = SQLCatalog(uri, snapshot=path)
+    assert list(cat) == ['one']
+    assert cat.one.describe()['container'] == 'dataframe'
+    assert cat._entries.info['one']['primary_key'] == ['k']
+
+    # reopened with the schema unchanged, nothing is reflected
+    def fail(*args, **kwargs):
+        raise AssertionError("reflected again")
+    monkeypatch.setattr(sa.engine.reflection.Inspector, "get_multi_columns",
+                        fail)
+    monkeypatch.setattr(sa, "Table", fail)
+    cat = SQLCatalog(uri, snapshot=path)
+    assert list(cat) == ['one']
+    assert isinstance(cat.one, SQLSourceAutoPartition)
+    monkeypatch.undo()
+
+    # DDL changes the schema version, and so the snapshot is renewed
+    pd.DataFrame({'x': [1]}).to_sql('two', engine, index=False)
+    cat = SQLCatalog(uri, snapshot=path)
+    assert sorted(cat) == ['one', 'two']
+    assert isinstance(cat.two, SQLSource)
+
+
+def test_schemas(tmpdir):
+    import pandas as pd
+    import sqlalchemy as sa
+    from intake_sql.engines import get_engine
+    uri = 'sqlite:///' + str(tmpdir.join('main.db'))
+    names = ['sales_eu', 'sales_us', 'other']
+    for name in names:
+        pd.DataFrame({'x': [1, 2]}).to_sql(
+            'orders', 'sqlite:///' + str(tmpdir.join(name + '.db')))
+
+    def attach(con, record):
+        for name in names:
+            con.execute("ATTACH DATABASE '%s' AS %s"
+                        % (tmpdir.join(name + '.db'), name))
+    engine = get_engine(uri)
+    sa.event.listen(engine, 'connect', attach)
+
+    cat = SQLCatalog(uri, schemas='sales_*', max_workers=2)
+    assert sorted(cat) == ['sales_eu', 'sales_us']
+    sub = cat.sales_us
+    assert isinstance(sub, SQLCatalog)
+    assert sub._entries.tables == {'sales_us.orders': 'orders'}
+    assert sub['sales_us.orders'].read().x.tolist() == [1, 2]
+    assert list(SQLCatalog(uri, schemas=['other'])) == ['other']
+
+
+def test_estimates(tmpdir):
+    import pandas as pd
+    import sqlalchemy as sa
+    uri = 'sqlite:///' + str(tmpdir.join('est.db'))
+    engine = sa.create_engine(uri)
+    pd.DataFrame({'x': range(1000)}).to_sql('big', engine)
+    pd.DataFrame({'x': range(10)}).to_sql('small', engine)
+    with engine.begin() as con:
+        con.execute(sa.text("ANALYZE"))
+    cat = SQLCatalog(uri)
+    assert cat.big.metadata['estimated_rows'] == 1000
+    assert cat.small.metadata['estimated_rows'] == 10
+    if 'estimated_bytes' in cat.big.metadata:  # needs dbstat
+        assert (cat.big.metadata['estimated_bytes'] >
+                cat.small.metadata['estimated_bytes'])
+
+
+def test_partition_size(tmpdir):
+    import pandas as pd
+    import sqlalchemy as sa
+    uri = 'sqlite:///' + str(tmpdir.join('sized.db'))
+    engine = sa.create_engine(uri)
+    with engine.begin() as con:
+        for name in ['big', 'small']:
+            con.execute(sa.text("CREATE TABLE %s (k INTEGER PRIMARY KEY, "
+                                "v TEXT)" % name))
+    pd.DataFrame({'v': ['x' * 100] * 2000}).to_sql(
+        'big', engine, if_exists='append', index=False)
+    pd.DataFrame({'v': ['x']}).to_sql(
+        'small', engine, if_exists='append', index=False)
+    cat = SQLCatalog(uri, partition_size='50kB')
+    meta = cat.big.metadata
+    if 'estimated_bytes' in meta:  # needs dbstat
+        n = -(-meta['estimated_bytes'] // 50000)
+        assert n > 1
+        assert cat.big.discover()['npartitions'] == n
+        assert cat.small.discover()['npartitions'] == 1
+    else:
+        assert cat.big._captured_init_kwargs['sql_kwargs'] == {
+            'bytes_per_chunk': 50000}
+    assert len(cat.big.read()) == 2000
+
+    cat = SQLCatalog(uri, partition_size='50kB',
+                     sql_kwargs={'npartitions': 3})
+    assert cat.big.discover()['npartitions'] == 3
+
+
+def test_keyset_entries(tmpdir):
+    import sqlalchemy as sa
+    uri = 'sqlite:///' + str(tmpdir.join('keys.db'))
+    engine = sa.create_engine(uri)
+    with engine.begin() as con:
+        con.execute(sa.text("CREATE TABLE pair (a INTEGER, b INTEGER, "
+                            "v TEXT, PRIMARY KEY (a, b))"))
+        con.execute(sa.text("CREATE TABLE named (n VARCHAR(20) PRIMARY KEY,"
+                            " v INTEGER)"))
+        con.execute(sa.text("CREATE TABLE flipped (a INTEGER, b INTEGER, "
+                            "PRIMARY KEY (b, a))"))
+        con.execute(sa.text("INSERT INTO pair VALUES (1, 1, 'x'), (1, 2, 'y'),"
+                            " (2, 1, 'z')"))
+        con.execute(sa.text("INSERT INTO named VALUES ('b', 1), ('a', 2)"))
+    cat = SQLCatalog(uri, sql_kwargs={'npartitions': 2})
+    args = cat.pair._captured_init_kwargs
+    assert args['index'] == ['a', 'b']
+    assert args['partition_method'] == 'keyset'
+    assert sorted(cat.pair.read().v) == ['x', 'y', 'z']
+    assert cat.named._captured_init_kwargs['partition_method'] == 'keyset'
+    # in the order of the key's index
+    assert cat.flipped._captured_init_kwargs['index'] == ['b', 'a']
+    assert cat.named.read().index.tolist() == ['a', 'b']
+
+
+class _FakeOracle(object):
+    """Engine stand-in recording the parameters of its queries"""
+
+    def __init__(self, rows):
+        from sqlalchemy.dialects.oracle.base import OracleDialect
+        self.dialect = OracleDialect()
+        self.rows = rows
+        self.params = []
+
+    def connect(self):
+        import contextlib
+        return contextlib.nullcontext(self)
+
+    def execute(self, query, params):
+        import types
+        self.params.append(params)
+        return types.SimpleNamespace(first=lambda: self.rows[0],
+                                     fetchall=lambda: self.rows)
+
+
+def test_oracle_names():
+    from intake_sql.sql_cat import schema_version
+    engine = _FakeOracle([(3, None)])
+    assert schema_version(engine, 'sales') == [3, None]
+    assert engine.params == [{'schema': 'SALES'}]
+
+
+def test_oracle_estimates():
+    from intake_sql.sql_cat import table_estimates
+    engine = _FakeOracle([('ORDERS', 10, 800), ('MixedCase', None, None)])
+    assert table_estimates(engine, 'sales') == {
+        'orders': (10, 800), 'MixedCase': (None, None)}
+    assert engine.params == [{'schema': 'SALES'}]